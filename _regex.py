@@ -0,0 +1,14 @@
+"""
+Expresiones regulares compartidas entre los módulos del pipeline
+"""
+
+try:
+    # re2 (DFA, tiempo lineal) si está instalado; misma API que re
+    import re2 as re
+except ImportError:
+    import re
+
+
+# Entidades HTML con nombre (&amp;) o numéricas (&#8217;)
+HTML_ENTITY_RE = re.compile(r'&(?:[a-zA-Z]+|#\d+);')
+HTML_ENTITY_BYTES_RE = re.compile(rb'&(?:[a-zA-Z]+|#\d+);')
@@ -5,16 +5,49 @@ Script para procesar múltiples datasets en lote
 import os
 import sys
 import argparse
+from itertools import chain
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
+from typing import Iterator
 from generic_pipeline import GenericDataPipeline
 
 
+def _process_one(filepath: str, output_dir: str, force_clean: bool) -> dict:
+    """
+    Ejecuta el pipeline sobre un archivo (en un proceso trabajador).
+    
+    Returns:
+        Diccionario serializable con el resultado del archivo
+    """
+    try:
+        # Ejecutar pipeline (el directorio de salida ya existe). El
+        # paralelismo es entre archivos: la limpieza usa un solo proceso
+        pipeline = GenericDataPipeline(filepath, output_dir, force_clean, max_workers=1)
+        success = pipeline.execute()
+        
+        return {
+            'file': filepath,
+            'status': 'SUCCESS' if success else 'FAILED'
+        }
+    
+    except Exception as e:
+        print(f"❌ Error procesando {filepath}: {e}")
+        return {
+            'file': filepath,
+            'status': 'ERROR',
+            'error': str(e)
+        }
+
+
 class BatchProcessor:
     """
     Procesa múltiples datasets automáticamente.
     """
 
-    def __init__(self, input_pattern: str, output_dir: str = None, force_clean: bool = False):
+    def __init__(self, input_pattern: str, output_dir: str = None, force_clean: bool = False,
+                 max_workers: int = None):
         """
         Inicializa el procesador en lote.
         
@@ -22,22 +55,26 @@ class BatchProcessor:
             input_pattern: Patrón de archivos (ej: "*.csv", "data/*.csv")
             output_dir: Directorio de salida
             force_clean: Forzar limpieza
+            max_workers: Procesos en paralelo (por defecto, número de CPUs)
         """
         self.input_pattern = input_pattern
         self.output_dir = output_dir
         self.force_clean = force_clean
+        self.max_workers = max_workers or os.cpu_count()
         self.results = []
+        self._made_dirs = set()
 
-    def find_files(self) -> list:
-        """Encuentra archivos que coinciden con el patrón."""
-        files = list(Path('.').glob(self.input_pattern))
-        return sorted([str(f) for f in files])
+    def find_files(self) -> Iterator[str]:
+        """Encuentra archivos que coinciden con el patrón (de forma perezosa)."""
+        for path in Path('.').glob(self.input_pattern):
+            yield str(path)
 
     def process_all(self) -> bool:
         """Procesa todos los archivos encontrados."""
         files = self.find_files()
+        first = next(files, None)
         
-        if not files:
+        if first is None:
             print(f"❌ No se encontraron archivos con patrón: {self.input_pattern}")
             return False
         
@@ -45,36 +82,84 @@ class BatchProcessor:
         print(f"🔄 PROCESAMIENTO EN LOTE")
         print("=" * 70)
         print(f"Patrón: {self.input_pattern}")
-        print(f"Archivos encontrados: {len(files)}")
+        print(f"Procesos en paralelo: {self.max_workers}")
         print()
         
-        for i, filepath in enumerate(files, 1):
-            print(f"\n[{i}/{len(files)}] Procesando: {filepath}")
-            print("-" * 70)
+        # El pipeline escribe nombres fijos (Dataset_cleaned.csv, reportes)
+        # en el directorio de salida: los archivos que comparten directorio
+        # se encolan y se procesan de a uno para no pisarse entre procesos.
+        pending = {}
+        queued = {}
+        found = 0
+        
+        def record_error(filepath: str, error: Exception) -> None:
+            print(f"❌ Error procesando {filepath}: {error}")
+            self.results.append({
+                'file': filepath,
+                'status': 'ERROR',
+                'error': str(error) or type(error).__name__
+            })
+        
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            def submit(filepath: str, output_dir: str) -> bool:
+                # Si el pool quedó roto (un proceso murió) el archivo se
+                # registra como ERROR en lugar de abortar el lote
+                try:
+                    future = executor.submit(_process_one, filepath, output_dir, self.force_clean)
+                except BrokenProcessPool as e:
+                    record_error(filepath, e)
+                    return False
+                pending[future] = (filepath, output_dir)
+                return True
             
-            try:
+            # Los archivos se envían a medida que el glob los encuentra,
+            # así el recorrido del árbol se solapa con el procesamiento.
+            for filepath in chain([first], files):
+                found += 1
+                
                 # Determinar directorio de salida
                 output_dir = self.output_dir or os.path.dirname(filepath) or '.'
                 
-                # Crear directorio si no existe
-                os.makedirs(output_dir, exist_ok=True)
+                # Crear directorio si no existe (una sola vez por directorio)
+                if output_dir not in self._made_dirs:
+                    try:
+                        os.makedirs(output_dir, exist_ok=True)
+                    except OSError as e:
+                        record_error(filepath, e)
+                        continue
+                    self._made_dirs.add(output_dir)
                 
-                # Ejecutar pipeline
-                pipeline = GenericDataPipeline(filepath, output_dir, self.force_clean)
-                success = pipeline.execute()
-                
-                self.results.append({
-                    'file': filepath,
-                    'status': 'SUCCESS' if success else 'FAILED'
-                })
+                if output_dir in queued:
+                    queued[output_dir].append(filepath)
+                else:
+                    queued[output_dir] = deque()
+                    submit(filepath, output_dir)
+            
+            print(f"Archivos encontrados: {found}")
+            
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
                 
-            except Exception as e:
-                print(f"❌ Error procesando {filepath}: {e}")
-                self.results.append({
-                    'file': filepath,
-                    'status': 'ERROR',
-                    'error': str(e)
-                })
+                for future in done:
+                    filepath, output_dir = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        # El proceso trabajador murió (BrokenProcessPool, OOM)
+                        record_error(filepath, e)
+                        result = self.results[-1]
+                    else:
+                        self.results.append(result)
+                    
+                    print(f"\n[{len(self.results)}/{found}] {result['status']}: {result['file']}")
+                    print("-" * 70)
+                    
+                    waiting = queued[output_dir]
+                    while waiting:
+                        if submit(waiting.popleft(), output_dir):
+                            break
+                    else:
+                        del queued[output_dir]
         
         # Mostrar resumen
         self.print_summary()
@@ -115,10 +200,15 @@ def main():
     parser.add_argument('-o', '--output', help='Directorio de salida')
     parser.add_argument('-f', '--force', action='store_true',
                        help='Forzar limpieza para todos los archivos')
+    parser.add_argument('-w', '--workers', type=int,
+                       help='Número de procesos en paralelo (default: número de CPUs). '
+                            'Los archivos con el mismo directorio de salida se procesan '
+                            'de a uno (el pipeline usa nombres fijos): con -o, o con todos '
+                            'los archivos en una misma carpeta, no hay paralelismo')
     
     args = parser.parse_args()
     
-    processor = BatchProcessor(args.pattern, args.output, args.force)
+    processor = BatchProcessor(args.pattern, args.output, args.force, args.workers)
     success = processor.process_all()
     
     sys.exit(0 if success else 1)
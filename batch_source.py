@@ -0,0 +1,102 @@
+"""
+Fuente de filas por lotes compartida entre las etapas del pipeline
+"""
+
+import csv
+import os
+from itertools import islice
+from typing import Any, Dict, Iterator, List
+
+from config import config_dialect
+
+
+# Filas mínimas por lote entregado a las etapas
+MIN_BATCH_SIZE = 50_000
+
+# Buffer de lectura del CSV de entrada
+_IO_BUFSIZE = 1 << 20
+
+
+class BatchSource:
+    """
+    Lee el CSV de entrada una sola vez y entrega sus filas en lotes.
+
+    Las primeras filas quedan en memoria tras head(), así el análisis
+    (que solo mira el comienzo del archivo) y la limpieza (que lo recorre
+    completo) comparten la misma lectura.
+    """
+
+    def __init__(self, filepath: str, config: Dict[str, Any], batch_size: int = None,
+                 workers: int = None):
+        """
+        Inicializa la fuente (el archivo se abre al primer uso).
+        
+        Args:
+            filepath: Ruta del archivo CSV
+            config: Diccionario con configuración (delimiter, quotechar, encoding)
+            batch_size: Filas por lote (por defecto, filas / workers con
+                mínimo MIN_BATCH_SIZE)
+            workers: Procesos que limpiarán los lotes (por defecto, número de CPUs)
+        """
+        self.filepath = filepath
+        self.config = config
+        # Lotes de filas: uno por proceso como mínimo (filas / CPUs)
+        self.batch_size = batch_size or max(
+            MIN_BATCH_SIZE, config.get('rows', 0) // (workers or os.cpu_count() or 1) + 1)
+        self.header = None
+        self.read_errors = []  # Mensajes de las filas que csv no pudo leer
+        self._file = None
+        self._rows = None
+        self._buffer = []
+
+    def open(self) -> 'BatchSource':
+        """Abre el archivo y lee el encabezado."""
+        if self._file is None:
+            self._file = open(self.filepath, 'r', encoding=self.config['encoding'],
+                              newline='', buffering=_IO_BUFSIZE)
+            reader = csv.reader(self._file, dialect=config_dialect(self.config))
+            self.header = next(reader, None)
+            self._rows = self._iter_rows(reader)
+        return self
+
+    def close(self) -> None:
+        """Cierra el archivo."""
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self) -> 'BatchSource':
+        return self.open()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _iter_rows(self, reader) -> Iterator[List[str]]:
+        """Recorre las filas registrando (y saltando) las que no se pueden leer."""
+        while True:
+            try:
+                yield next(reader)
+            except StopIteration:
+                return
+            except csv.Error as e:
+                self.read_errors.append(str(e))
+
+    def head(self, n: int) -> List[List[str]]:
+        """Retorna las primeras n filas de datos (sin consumirlas)."""
+        self.open()
+        if len(self._buffer) < n:
+            self._buffer.extend(islice(self._rows, n - len(self._buffer)))
+        return self._buffer[:n]
+
+    def batches(self) -> Iterator[List[List[str]]]:
+        """Entrega las filas de datos en lotes de batch_size (una sola vez)."""
+        self.open()
+        batch, self._buffer = self._buffer, []
+        
+        for row in self._rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        
+        if batch:
+            yield batch
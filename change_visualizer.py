@@ -6,12 +6,84 @@ Compara el archivo original con el limpio y genera un reporte detallado
 """
 
 import csv
+import io
+import os
+import stat
 import sys
+from collections import defaultdict
+from itertools import chain
 from pathlib import Path
-from typing import List, Tuple, Dict
+from typing import Iterator, List, Tuple, Dict
 from datetime import datetime
 
 
+# Buffer de lectura de los CSV comparados
+_CSV_BUFSIZE = 1 << 22
+
+# Tamaño de bloque para detectar el prefijo idéntico
+_BLOCK_SIZE = 64 * 1024
+
+
+def _prefetch(f) -> None:
+    """Anuncia lectura secuencial y pide prelectura asíncrona (solo POSIX)"""
+    if hasattr(os, 'posix_fadvise'):
+        fd = f.fileno()
+        # En tuberías y FIFOs fadvise falla (ESPIPE) y no tiene sentido
+        if not stat.S_ISREG(os.fstat(fd).st_mode):
+            return
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+
+
+def _common_prefix(f_a, f_b, stop: bytes) -> Tuple[int, int]:
+    """
+    Busca el prefijo idéntico de dos archivos binarios comparando bloques
+    de 64 KiB (memcmp), sin tokenizar CSV.
+    
+    El prefijo se recorta al último salto de línea antes de la primera
+    diferencia o del primer byte stop (la comilla, que puede abrir campos
+    multilínea). Retorna (bytes del prefijo, líneas que contiene).
+    """
+    offset = 0
+    lines = 0
+    # Último salto de línea de los bloques saltados (offset tras él, líneas)
+    last_cut = last_lines = 0
+    
+    while True:
+        block_a = f_a.read(_BLOCK_SIZE)
+        block_b = f_b.read(_BLOCK_SIZE)
+        
+        if block_a and block_a == block_b and stop not in block_a:
+            newline = block_a.rfind(b'\n')
+            lines += block_a.count(b'\n')
+            if newline != -1:
+                last_cut, last_lines = offset + newline + 1, lines
+            offset += len(block_a)
+            continue
+        
+        # Posición de la primera diferencia dentro del bloque (búsqueda binaria)
+        lo, hi = 0, min(len(block_a), len(block_b))
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if block_a[:mid] == block_b[:mid]:
+                lo = mid
+            else:
+                hi = mid - 1
+        
+        stop_at = block_a.find(stop, 0, lo)
+        end = stop_at if stop_at != -1 else lo
+        
+        # Al final de ambos archivos el prefijo es el archivo completo
+        if end == len(block_a) == len(block_b):
+            return offset + end, lines + block_a.count(b'\n')
+        
+        cut = block_a.rfind(b'\n', 0, end) + 1
+        if not cut:
+            # La línea de la diferencia empezó en un bloque anterior
+            return last_cut, last_lines
+        return offset + cut, lines + block_a.count(b'\n', 0, cut)
+
+
 class ChangeVisualizer:
     """Visualiza cambios entre archivo original y limpio"""
     
@@ -21,104 +93,165 @@ class ChangeVisualizer:
         self.config = config or {}
         self.delimiter = self.config.get('delimiter', ';')
         self.quotechar = self.config.get('quotechar', '"')
-        self.changes = []
         self.max_display = 10
+        self.changes = []  # Solo los primeros max_display, con detalle
+        self.remaining_by_row = defaultdict(list)  # Resto: fila -> columnas
+        self.total_changes = 0
         
-    def read_csv_file(self, filepath: str) -> List[List[str]]:
-        """Lee archivo CSV con configuración automática"""
+    def compare_files(self) -> None:
+        """Compara archivos original y limpio en una sola pasada"""
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                reader = csv.reader(f, delimiter=self.delimiter, quotechar=self.quotechar)
-                return list(reader)
+            with open(self.original_file, 'rb', buffering=_CSV_BUFSIZE) as raw_orig, \
+                 open(self.cleaned_file, 'rb', buffering=_CSV_BUFSIZE) as raw_clean:
+                # Pedir al kernel que lea ambos archivos por adelantado, así
+                # la lectura de uno se solapa con la del otro
+                _prefetch(raw_orig)
+                _prefetch(raw_clean)
+                
+                # Saltar en bloque el prefijo idéntico de ambos archivos (requiere
+                # volver atrás: con tuberías se compara fila por fila)
+                seekable = raw_orig.seekable() and raw_clean.seekable()
+                offset = 0
+                if seekable:
+                    offset, skipped_lines = _common_prefix(raw_orig, raw_clean, self.quotechar.encode())
+                
+                if offset:
+                    raw_orig.seek(0)
+                    header = self._split_line(raw_orig.readline().decode('utf-8'))
+                    cleaned_header = header
+                
+                if seekable:
+                    raw_orig.seek(offset)
+                    raw_clean.seek(offset)
+                f_orig = io.TextIOWrapper(raw_orig, encoding='utf-8', newline='')
+                f_clean = io.TextIOWrapper(raw_clean, encoding='utf-8', newline='')
+                
+                if not offset:
+                    header = next(csv.reader(f_orig, delimiter=self.delimiter, quotechar=self.quotechar), None)
+                    cleaned_header = next(csv.reader(f_clean, delimiter=self.delimiter, quotechar=self.quotechar), None)
+                    skipped_lines = 1
+                
+                if header is None or cleaned_header is None:
+                    print("Error: No se pudieron leer los archivos")
+                    return
+                
+                # El encabezado es la fila 1
+                self._compare_row(1, header, cleaned_header, None)
+                
+                # Comparar fila por fila
+                for row_idx, original_row, cleaned_row in self._differing_rows(f_orig, f_clean,
+                                                                               skipped_lines + 1):
+                    self._compare_row(row_idx, original_row, cleaned_row, header)
         except Exception as e:
-            print(f"Error leyendo {filepath}: {e}")
-            return []
+            print(f"Error leyendo archivos: {e}")
     
-    def compare_files(self) -> None:
-        """Compara archivos original y limpio"""
-        original = self.read_csv_file(self.original_file)
-        cleaned = self.read_csv_file(self.cleaned_file)
-        
-        if not original or not cleaned:
-            print("Error: No se pudieron leer los archivos")
-            return
+    def _differing_rows(self, f_orig, f_clean, start: int = 2) -> Iterator[Tuple[int, List[str], List[str]]]:
+        """
+        Recorre ambos archivos en paralelo y produce las filas distintas.
         
-        # Comparar fila por fila
-        for row_idx in range(min(len(original), len(cleaned))):
-            original_row = original[row_idx]
-            cleaned_row = cleaned[row_idx]
+        Mientras no aparezca la comilla, las líneas idénticas se descartan
+        sin tokenizar y las distintas se separan por el delimitador; desde
+        la primera comilla se delega en csv.reader (campos multilínea).
+        """
+        for row_idx, (orig_line, clean_line) in enumerate(zip(f_orig, f_clean), start=start):
+            if self.quotechar in orig_line or self.quotechar in clean_line:
+                orig_reader = csv.reader(chain([orig_line], f_orig),
+                                         delimiter=self.delimiter, quotechar=self.quotechar)
+                clean_reader = csv.reader(chain([clean_line], f_clean),
+                                          delimiter=self.delimiter, quotechar=self.quotechar)
+                
+                for row_idx, (original_row, cleaned_row) in enumerate(zip(orig_reader, clean_reader), start=row_idx):
+                    if original_row != cleaned_row:
+                        yield row_idx, original_row, cleaned_row
+                return
             
-            # Comparar celda por celda
-            for col_idx in range(min(len(original_row), len(cleaned_row))):
-                if original_row[col_idx] != cleaned_row[col_idx]:
-                    self.changes.append({
-                        'row': row_idx + 1,
-                        'col': col_idx + 1,
-                        'original': original_row[col_idx],
-                        'cleaned': cleaned_row[col_idx],
-                        'column_name': original[0][col_idx] if row_idx > 0 else 'N/A'
-                    })
+            if orig_line != clean_line:
+                yield row_idx, self._split_line(orig_line), self._split_line(clean_line)
     
-    def generate_report(self, output_file: str = None) -> str:
-        """Genera reporte de cambios"""
-        if not self.changes:
-            return "✓ No se encontraron cambios"
+    def _split_line(self, line: str) -> List[str]:
+        """Separa una línea sin comillas (equivalente a csv.reader)"""
+        line = line.rstrip('\r\n')
+        return line.split(self.delimiter) if line else []
+    
+    def _compare_row(self, row: int, original_row: List[str], cleaned_row: List[str],
+                     header: List[str] = None) -> None:
+        """Registra las celdas distintas de una fila"""
+        # Comparar celda por celda
+        for col_idx, (original, cleaned) in enumerate(zip(original_row, cleaned_row)):
+            if original != cleaned:
+                self.total_changes += 1
+                if len(self.changes) >= self.max_display:
+                    self.remaining_by_row[row].append(col_idx + 1)
+                    continue
+                
+                column_name = header[col_idx] if header and col_idx < len(header) else 'N/A'
+                self.changes.append({
+                    'row': row,
+                    'col': col_idx + 1,
+                    'original': original,
+                    'cleaned': cleaned,
+                    'column_name': column_name
+                })
+    
+    def _write_report(self, write) -> None:
+        """Escribe el reporte línea a línea usando la función write"""
+        def line(text: str = "") -> None:
+            write(text)
+            write("\n")
         
-        report = []
-        report.append("╔" + "═" * 78 + "╗")
-        report.append("║" + " " * 78 + "║")
-        report.append("║" + "REPORTE DE CAMBIOS - VISUALIZADOR DE LIMPIEZA".center(78) + "║")
-        report.append("║" + " " * 78 + "║")
-        report.append("╚" + "═" * 78 + "╝")
-        report.append("")
-        report.append(f"📊 RESUMEN")
-        report.append(f"  Total de cambios: {len(self.changes)}")
-        report.append(f"  Archivo original: {self.original_file}")
-        report.append(f"  Archivo limpio: {self.cleaned_file}")
-        report.append(f"  Fecha: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        report.append("")
+        line("╔" + "═" * 78 + "╗")
+        line("║" + " " * 78 + "║")
+        line("║" + "REPORTE DE CAMBIOS - VISUALIZADOR DE LIMPIEZA".center(78) + "║")
+        line("║" + " " * 78 + "║")
+        line("╚" + "═" * 78 + "╝")
+        line()
+        line(f"📊 RESUMEN")
+        line(f"  Total de cambios: {self.total_changes}")
+        line(f"  Archivo original: {self.original_file}")
+        line(f"  Archivo limpio: {self.cleaned_file}")
+        line(f"  Fecha: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        line()
         
         # Mostrar primeros 10 cambios
-        report.append("📝 PRIMEROS CAMBIOS DETECTADOS")
-        report.append("")
-        
-        for idx, change in enumerate(self.changes[:self.max_display], 1):
-            report.append(f"Cambio #{idx}")
-            report.append(f"  Ubicación: Fila {change['row']}, Columna {change['col']}")
-            report.append(f"  Columna: {change['column_name']}")
-            report.append(f"  Original:  {repr(change['original'][:50])}")
-            report.append(f"  Limpio:    {repr(change['cleaned'][:50])}")
+        line("📝 PRIMEROS CAMBIOS DETECTADOS")
+        line()
+        
+        for idx, change in enumerate(self.changes, 1):
+            line(f"Cambio #{idx}")
+            line(f"  Ubicación: Fila {change['row']}, Columna {change['col']}")
+            line(f"  Columna: {change['column_name']}")
+            line(f"  Original:  {repr(change['original'][:50])}")
+            line(f"  Limpio:    {repr(change['cleaned'][:50])}")
             
             # Mostrar diferencia
             if len(change['original']) != len(change['cleaned']):
-                report.append(f"  Diferencia: {len(change['original'])} → {len(change['cleaned'])} caracteres")
-            report.append("")
+                line(f"  Diferencia: {len(change['original'])} → {len(change['cleaned'])} caracteres")
+            line()
         
         # Si hay más de 10 cambios, mostrar resumen
-        if len(self.changes) > self.max_display:
-            report.append("📋 RESUMEN DE CAMBIOS RESTANTES")
-            report.append("")
-            report.append(f"Total de cambios restantes: {len(self.changes) - self.max_display}")
-            report.append("")
-            report.append("Ubicaciones de cambios (Fila, Columna):")
-            report.append("")
-            
-            # Agrupar por fila
-            changes_by_row = {}
-            for change in self.changes[self.max_display:]:
-                row = change['row']
-                if row not in changes_by_row:
-                    changes_by_row[row] = []
-                changes_by_row[row].append(change['col'])
+        if self.remaining_by_row:
+            line("📋 RESUMEN DE CAMBIOS RESTANTES")
+            line()
+            line(f"Total de cambios restantes: {self.total_changes - len(self.changes)}")
+            line()
+            line("Ubicaciones de cambios (Fila, Columna):")
+            line()
             
-            for row in sorted(changes_by_row.keys()):
-                cols = sorted(changes_by_row[row])
-                report.append(f"  Fila {row}: Columnas {cols}")
+            # Ya agrupados por fila (las columnas llegan en orden dentro de cada fila)
+            for row in sorted(self.remaining_by_row):
+                line(f"  Fila {row}: Columnas {self.remaining_by_row[row]}")
         
-        report.append("")
-        report.append("═" * 80)
+        line()
+        write("═" * 80)
+    
+    def generate_report(self, output_file: str = None) -> str:
+        """Genera reporte de cambios"""
+        if not self.changes:
+            return "✓ No se encontraron cambios"
         
-        report_text = "\n".join(report)
+        buf = io.StringIO()
+        self._write_report(buf.write)
+        report_text = buf.getvalue()
         
         # Guardar en archivo si se especifica
         if output_file:
@@ -128,6 +261,15 @@ class ChangeVisualizer:
         
         return report_text
     
+    def save_report(self, output_file: str) -> None:
+        """Escribe el reporte directamente en archivo, sin armarlo en memoria"""
+        if not self.changes:
+            return
+        
+        with open(output_file, 'w', encoding='utf-8', buffering=1 << 20) as f:
+            self._write_report(f.write)
+        print(f"✓ Reporte guardado en: {output_file}")
+    
     def print_report(self) -> None:
         """Imprime el reporte en consola"""
         report = self.generate_report()
@@ -165,7 +307,7 @@ def main():
     
     # Generar reporte
     if output_file:
-        visualizer.generate_report(output_file)
+        visualizer.save_report(output_file)
     
     # Imprimir reporte
     visualizer.print_report()
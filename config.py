@@ -2,10 +2,49 @@
 Configuración automática para detectar características del dataset
 """
 
+import codecs
 import csv
-from typing import Dict, Any, Tuple
+import io
+import mmap
+import os
+from itertools import islice
+from typing import Dict, Any, Tuple, Type
 from collections import Counter
 
+from _regex import HTML_ENTITY_RE
+
+
+# Buffer de lectura (4 MiB) para recorrer el CSV con menos llamadas a read()
+_CSV_BUFSIZE = 1 << 22
+
+# Tamaño de ventana para contar saltos de línea sobre el mmap
+_COUNT_WINDOW = 1 << 20
+
+# Bloque inicial usado para detectar delimitador, comilla y encoding
+_PROBE_SLAB = 64 * 1024
+
+# Filas muestreadas para el análisis de calidad
+_QUALITY_SAMPLE_ROWS = 1000
+
+# Tabla de 256 bytes: 1 para bytes no ASCII que no forman parte de los
+# caracteres españoles permitidos (en UTF-8 todos son 0xC3 + continuación)
+_ALLOWED_BYTES = set('áéíóúñüÁÉÍÓÚÑÜ'.encode('utf-8'))
+_BAD_BYTES_TABLE = bytes(0 if (b < 128 or b in _ALLOWED_BYTES) else 1 for b in range(256))
+
+
+def make_dialect(delimiter: str, quotechar: str) -> Type[csv.Dialect]:
+    """
+    Crea un dialecto csv (subclase de csv.excel) con el delimitador y la
+    comilla dados. Cada configuración guarda el suyo en config['dialect'],
+    sin registrar un nombre global que otra configuración pueda pisar.
+    """
+    return type('DetectedDialect', (csv.excel,), {'delimiter': delimiter, 'quotechar': quotechar})
+
+
+def config_dialect(config: Dict[str, Any]) -> Type[csv.Dialect]:
+    """Retorna el dialecto de una configuración (lo crea si no lo trae)."""
+    return config.get('dialect') or make_dialect(config['delimiter'], config['quotechar'])
+
 
 class DatasetConfig:
     """
@@ -16,22 +55,84 @@ class DatasetConfig:
     def __init__(self, filepath: str):
         self.filepath = filepath
         self.config = {}
+        self._probed = None
 
-    def detect_delimiter(self) -> str:
+    def _probe_once(self) -> Dict[str, Any]:
         """
-        Detecta automáticamente el delimitador del CSV.
-        Prueba: ; , \t | 
+        Recorre el archivo una sola vez y guarda todo lo que necesitan
+        los métodos detect_* y analyze_data_quality.
         """
         delimiters = [';', ',', '\t', '|']
+        encodings = ['utf-8', 'latin-1', 'iso-8859-1', 'cp1252']
         
-        with open(self.filepath, 'r', encoding='utf-8') as f:
-            first_line = f.readline()
-        
-        # Contar ocurrencias de cada delimitador
-        delimiter_counts = {d: first_line.count(d) for d in delimiters}
+        probed = {
+            'delimiter': delimiters[0],
+            'quotechar': '"',
+            'encoding': None,
+            'header': [],
+            'sample_rows': [],
+            'rows': 0
+        }
         
-        # El delimitador más probable es el que más aparece
-        detected = max(delimiter_counts, key=delimiter_counts.get)
+        with open(self.filepath, 'rb', buffering=_CSV_BUFSIZE) as raw:
+            if os.fstat(raw.fileno()).st_size == 0:
+                self._probed = probed
+                return probed
+            
+            with mmap.mmap(raw.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                slab = mm[:_PROBE_SLAB]
+                
+                # Contar saltos de línea por ventanas, sin iterar líneas en Python
+                newlines = sum(mm[i:i + _COUNT_WINDOW].count(b'\n')
+                               for i in range(0, len(mm), _COUNT_WINDOW))
+                ends_with_newline = mm[-1:] == b'\n'
+            
+            # Restar header (la última línea puede no terminar en salto)
+            probed['rows'] = newlines - 1 if ends_with_newline else newlines
+            
+            # Delimitador: el que más aparece en la primera línea
+            first_line = slab.split(b'\n', 1)[0]
+            delimiter_counts = {d: first_line.count(d.encode()) for d in delimiters}
+            probed['delimiter'] = max(delimiter_counts, key=delimiter_counts.get)
+            
+            # Comilla: la más frecuente en el bloque inicial
+            probed['quotechar'] = '"' if slab.count(b'"') > slab.count(b"'") else "'"
+            
+            # Encoding: un bloque ASCII es UTF-8 válido sin decodificarlo; si
+            # no, el primero que decodifica el bloque inicial (el decodificador
+            # incremental tolera un carácter cortado al final)
+            if slab.isascii():
+                probed['encoding'] = 'utf-8'
+            else:
+                for encoding in encodings:
+                    try:
+                        codecs.getincrementaldecoder(encoding)().decode(slab, final=False)
+                        probed['encoding'] = encoding
+                        break
+                    except (UnicodeDecodeError, LookupError):
+                        continue
+            
+            # Header y muestra de filas para el análisis de calidad
+            raw.seek(0)
+            text = io.TextIOWrapper(raw, encoding=probed['encoding'] or 'utf-8',
+                                    errors='replace', newline='')
+            try:
+                reader = csv.reader(text, dialect=make_dialect(probed['delimiter'],
+                                                               probed['quotechar']))
+                probed['header'] = next(reader, [])
+                probed['sample_rows'] = list(islice(reader, _QUALITY_SAMPLE_ROWS))
+            finally:
+                text.detach()
+        
+        self._probed = probed
+        return probed
+
+    def detect_delimiter(self) -> str:
+        """
+        Detecta automáticamente el delimitador del CSV.
+        Prueba: ; , \t | 
+        """
+        detected = (self._probed or self._probe_once())['delimiter']
         
         print(f"✓ Delimitador detectado: {repr(detected)}")
         return detected
@@ -41,13 +142,8 @@ class DatasetConfig:
         Detecta el carácter de comilla usado.
         Típicamente: " o '
         """
-        with open(self.filepath, 'r', encoding='utf-8') as f:
-            content = f.read(10000)  # Primeros 10KB
-        
-        double_quotes = content.count('"')
-        single_quotes = content.count("'")
+        quotechar = (self._probed or self._probe_once())['quotechar']
         
-        quotechar = '"' if double_quotes > single_quotes else "'"
         print(f"✓ Carácter de comilla detectado: {repr(quotechar)}")
         return quotechar
 
@@ -55,28 +151,20 @@ class DatasetConfig:
         """
         Detecta el encoding del archivo.
         """
-        encodings = ['utf-8', 'latin-1', 'iso-8859-1', 'cp1252']
+        encoding = (self._probed or self._probe_once())['encoding']
         
-        for encoding in encodings:
-            try:
-                with open(self.filepath, 'r', encoding=encoding) as f:
-                    f.read(1000)
-                print(f"✓ Encoding detectado: {encoding}")
-                return encoding
-            except (UnicodeDecodeError, LookupError):
-                continue
+        if encoding:
+            print(f"✓ Encoding detectado: {encoding}")
+            return encoding
         
         print("⚠ Encoding por defecto: utf-8")
         return 'utf-8'
 
-    def detect_column_count(self, delimiter: str, quotechar: str) -> int:
+    def detect_column_count(self) -> int:
         """
         Detecta el número de columnas.
         """
-        with open(self.filepath, 'r', encoding='utf-8') as f:
-            reader = csv.reader(f, delimiter=delimiter, quotechar=quotechar)
-            header = next(reader)
-            col_count = len(header)
+        col_count = len((self._probed or self._probe_once())['header'])
         
         print(f"✓ Columnas detectadas: {col_count}")
         return col_count
@@ -85,13 +173,12 @@ class DatasetConfig:
         """
         Detecta el número de filas de datos.
         """
-        with open(self.filepath, 'r', encoding='utf-8') as f:
-            row_count = sum(1 for _ in f) - 1  # Restar header
+        row_count = (self._probed or self._probe_once())['rows']
         
         print(f"✓ Filas detectadas: {row_count:,}")
         return row_count
 
-    def analyze_data_quality(self, delimiter: str, quotechar: str) -> Dict[str, Any]:
+    def analyze_data_quality(self) -> Dict[str, Any]:
         """
         Analiza la calidad de los datos para determinar si necesita limpieza.
         """
@@ -104,35 +191,26 @@ class DatasetConfig:
             'special_chars': 0
         }
         
-        with open(self.filepath, 'r', encoding='utf-8') as f:
-            reader = csv.reader(f, delimiter=delimiter, quotechar=quotechar)
-            header = next(reader)
-            expected_cols = len(header)
-            
-            for i, row in enumerate(reader):
-                if i >= 1000:  # Analizar primeras 1000 filas
+        probed = self._probed or self._probe_once()
+        rows = probed['sample_rows']  # Primeras 1000 filas
+        expected_cols = len(probed['header'])
+        
+        # Verificar inconsistencias de separadores
+        issues['separator_inconsistencies'] = sum(1 for row in rows if len(row) != expected_cols)
+        
+        # Verificar campos vacíos
+        issues['empty_fields'] = sum(1 for row in rows for field in row if not field or field.isspace())
+        
+        for row in rows:
+            # Verificar entidades HTML
+            for field in row:
+                if HTML_ENTITY_RE.search(field) is not None:
+                    issues['html_entities'] += 1
                     break
                 
-                # Verificar inconsistencias de separadores
-                if len(row) != expected_cols:
-                    issues['separator_inconsistencies'] += 1
-                
-                # Verificar campos vacíos
-                empty_count = sum(1 for field in row if not field.strip())
-                if empty_count > 0:
-                    issues['empty_fields'] += empty_count
-                
-                # Verificar entidades HTML
-                for field in row:
-                    if '&' in field and ';' in field:
-                        issues['html_entities'] += 1
-                        break
-                    
-                    # Verificar caracteres especiales problemáticos
-                    for char in field:
-                        if ord(char) > 127 and char not in 'áéíóúñüÁÉÍÓÚÑÜ':
-                            issues['special_chars'] += 1
-                            break
+                # Verificar caracteres especiales problemáticos
+                if not field.isascii() and b'\x01' in field.encode('utf-8').translate(_BAD_BYTES_TABLE):
+                    issues['special_chars'] += 1
         
         return issues
 
@@ -147,9 +225,9 @@ class DatasetConfig:
         delimiter = self.detect_delimiter()
         quotechar = self.detect_quotechar()
         encoding = self.detect_encoding()
-        col_count = self.detect_column_count(delimiter, quotechar)
+        col_count = self.detect_column_count()
         row_count = self.detect_row_count()
-        quality_issues = self.analyze_data_quality(delimiter, quotechar)
+        quality_issues = self.analyze_data_quality()
         
         # Determinar si necesita limpieza
         total_issues = sum(quality_issues.values())
@@ -159,6 +237,7 @@ class DatasetConfig:
             'filepath': self.filepath,
             'delimiter': delimiter,
             'quotechar': quotechar,
+            'dialect': make_dialect(delimiter, quotechar),
             'encoding': encoding,
             'columns': col_count,
             'rows': row_count,
@@ -3,9 +3,22 @@ Analizador genérico de datasets CSV
 """
 
 import csv
+import os
 import re
 from collections import Counter, defaultdict
-from typing import Dict, List, Any
+from itertools import islice
+from typing import Dict, List, Any, Tuple, Type
+
+from _regex import HTML_ENTITY_BYTES_RE
+from batch_source import BatchSource
+from config import config_dialect
+
+
+# Buffer de 4 MiB para todas las lecturas del dataset
+_CSV_BUFSIZE = 1 << 22
+
+# Patrón sobre bytes: evita decodificar el archivo completo
+_HIGH_BYTES_RE = re.compile(rb'[\x80-\xff]+')
 
 
 class GenericDatasetAnalyzer:
@@ -13,37 +26,70 @@ class GenericDatasetAnalyzer:
     Analizador genérico que funciona con cualquier dataset.
     """
 
-    def __init__(self, filepath: str, config: Dict[str, Any]):
+    def __init__(self, filepath: str, config: Dict[str, Any], dialect: Type[csv.Dialect] = None,
+                 source: BatchSource = None):
         """
         Inicializa el analizador.
         
         Args:
             filepath: Ruta del archivo
             config: Diccionario con configuración (delimiter, quotechar, encoding)
+            dialect: Dialecto csv (por defecto, el de config)
+            source: Fuente de lotes sobre filepath; si se indica, las muestras
+                se toman de ella y la limpieza reutiliza la misma lectura
         """
         self.filepath = filepath
         self.config = config
+        self.dialect = dialect or config_dialect(config)
+        self.source = source
         self.issues = defaultdict(list)
         self.stats = {}
 
+    def _head(self, n: int) -> Tuple[List[str], List[List[str]]]:
+        """Retorna el encabezado y las primeras n filas de datos."""
+        if self.source is not None:
+            self.source.open()
+            return self.source.header, self.source.head(n)
+        
+        with open(self.filepath, 'r', encoding=self.config['encoding'], buffering=_CSV_BUFSIZE) as f:
+            reader = csv.reader(f, dialect=self.dialect)
+            header = next(reader)
+            return header, list(islice(reader, n))
+
     def analyze_file_structure(self) -> Dict[str, Any]:
         """Analiza la estructura básica del archivo."""
         print("\n=== ANÁLISIS DE ESTRUCTURA ===")
         
-        with open(self.filepath, 'r', encoding=self.config['encoding']) as f:
-            content = f.read()
-        
-        lines = content.split('\n')
+        total_lines = 0
+        empty_lines = 0
+        header = None
+        last_line = b''
+        
+        # Una pasada en binario, sin cargar el archivo ni decodificarlo
+        with open(self.filepath, 'rb', buffering=_CSV_BUFSIZE) as f:
+            for last_line in f:
+                total_lines += 1
+                if last_line.isspace():
+                    empty_lines += 1
+                if header is None:
+                    header = last_line.rstrip(b'\r\n').decode(self.config['encoding'], errors='replace')
+        
+        # Tras un salto final (o en un archivo vacío) queda una línea vacía
+        if not last_line or last_line.endswith(b'\n'):
+            total_lines += 1
+            empty_lines += 1
+            if header is None:
+                header = ''
         
         stats = {
-            'total_lines': len(lines),
-            'file_size_chars': len(content),
-            'empty_lines': sum(1 for line in lines if not line.strip()),
-            'header': lines[0] if lines else None
+            'total_lines': total_lines,
+            'file_size_bytes': os.path.getsize(self.filepath),
+            'empty_lines': empty_lines,
+            'header': header
         }
         
         print(f"Total de líneas: {stats['total_lines']:,}")
-        print(f"Tamaño: {stats['file_size_chars']:,} caracteres")
+        print(f"Tamaño: {stats['file_size_bytes']:,} bytes")
         print(f"Líneas vacías: {stats['empty_lines']}")
         
         self.stats.update(stats)
@@ -54,27 +100,20 @@ class GenericDatasetAnalyzer:
         print("\n=== ANÁLISIS DE SEPARADORES ===")
         
         delimiter = self.config['delimiter']
-        quotechar = self.config['quotechar']
         
-        with open(self.filepath, 'r', encoding=self.config['encoding']) as f:
-            reader = csv.reader(f, delimiter=delimiter, quotechar=quotechar)
-            
-            header = next(reader)
-            expected_cols = len(header)
-            
-            inconsistent_rows = []
-            
-            for i, row in enumerate(reader, 2):
-                if i > 100:  # Analizar primeras 100 filas
-                    break
-                
-                if len(row) != expected_cols:
-                    inconsistent_rows.append((i, len(row), expected_cols))
-                    self.issues['separator_inconsistency'].append({
-                        'line': i,
-                        'found': len(row),
-                        'expected': expected_cols
-                    })
+        header, rows = self._head(99)  # Analizar primeras 100 filas
+        expected_cols = len(header)
+        
+        inconsistent_rows = []
+        
+        for i, row in enumerate(rows, 2):
+            if len(row) != expected_cols:
+                inconsistent_rows.append((i, len(row), expected_cols))
+                self.issues['separator_inconsistency'].append({
+                    'line': i,
+                    'found': len(row),
+                    'expected': expected_cols
+                })
         
         separator_stats = {
             'expected_columns': expected_cols,
@@ -92,18 +131,17 @@ class GenericDatasetAnalyzer:
         """Analiza problemas de codificación."""
         print("\n=== ANÁLISIS DE CODIFICACIÓN ===")
         
-        with open(self.filepath, 'r', encoding=self.config['encoding']) as f:
-            content = f.read()
+        with open(self.filepath, 'rb', buffering=_CSV_BUFSIZE) as f:
+            data = f.read()
         
+        # Solo se decodifican los tramos distintos de bytes no ASCII (en
+        # UTF-8 un carácter multibyte nunca queda partido entre tramos)
         problematic_chars = set()
-        html_entities = []
+        if not data.isascii():
+            high_runs = set(_HIGH_BYTES_RE.findall(data))
+            problematic_chars = set(b''.join(high_runs).decode(self.config['encoding'], errors='replace'))
         
-        for char in content:
-            if ord(char) > 127:
-                problematic_chars.add(char)
-        
-        html_pattern = re.compile(r'&[a-zA-Z]+;|&#\d+;')
-        html_entities = html_pattern.findall(content)
+        html_entities = HTML_ENTITY_BYTES_RE.findall(data)
         
         encoding_stats = {
             'non_ascii_chars': len(problematic_chars),
@@ -120,36 +158,25 @@ class GenericDatasetAnalyzer:
         """Analiza la calidad general de los datos."""
         print("\n=== ANÁLISIS DE CALIDAD ===")
         
-        delimiter = self.config['delimiter']
-        quotechar = self.config['quotechar']
-        
         quality_stats = {
             'empty_fields': 0,
             'duplicate_rows': 0,
             'rows_analyzed': 0
         }
         
-        with open(self.filepath, 'r', encoding=self.config['encoding']) as f:
-            reader = csv.reader(f, delimiter=delimiter, quotechar=quotechar)
-            next(reader)  # Skip header
-            
-            seen_rows = set()
-            
-            for i, row in enumerate(reader):
-                if i >= 1000:  # Analizar primeras 1000 filas
-                    break
-                
-                quality_stats['rows_analyzed'] += 1
-                
-                # Contar campos vacíos
-                empty_count = sum(1 for field in row if not field.strip())
-                quality_stats['empty_fields'] += empty_count
-                
-                # Detectar duplicados
-                row_tuple = tuple(row)
-                if row_tuple in seen_rows:
-                    quality_stats['duplicate_rows'] += 1
-                seen_rows.add(row_tuple)
+        _, rows = self._head(1000)  # Analizar primeras 1000 filas
+        
+        quality_stats['rows_analyzed'] = len(rows)
+        
+        # Contar campos vacíos de toda la muestra
+        quality_stats['empty_fields'] = sum(
+            1 for row in rows for field in row if not field or field.isspace()
+        )
+        
+        # Detectar duplicados: filas de la muestra menos huellas distintas
+        # (se guarda un hash de 64 bits por fila, no la fila completa)
+        fingerprints = {hash(tuple(row)) for row in rows}
+        quality_stats['duplicate_rows'] = len(rows) - len(fingerprints)
         
         print(f"Filas analizadas: {quality_stats['rows_analyzed']}")
         print(f"Campos vacíos: {quality_stats['empty_fields']}")
@@ -6,11 +6,218 @@ Funciona con cualquier delimitador y estructura
 import csv
 import re
 import html
-import unicodedata
 import os
-import shutil
-from typing import List, Tuple, Dict, Any
+from typing import List, Tuple, Dict, Any, Optional
 import logging
+from collections import deque
+from itertools import chain
+from operator import ne
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+
+from batch_source import BatchSource
+
+
+# Diccionario de reemplazos (claves de un carácter, para str.maketrans).
+# Puede extenderse con caracteres ASCII: los atajos de abajo se arman a
+# partir de las claves
+_CHAR_REPLACEMENTS = {
+    '\u201c': '"',  # Comilla izquierda
+    '\u201d': '"',  # Comilla derecha
+    '\u2018': "'",  # Apóstrofo izquierdo
+    '\u2019': "'",  # Apóstrofo derecho
+    '–': "-",  # Guion medio
+    '—': "-",  # Guion largo
+    '\xa0': " ",  # Espacio no rompible
+    '…': "...",  # Puntos suspensivos
+    '®': "(R)",  # Signo de registro
+    '©': "(C)",  # Signo de derechos de autor
+    '™': "(TM)",  # Marca registrada
+}
+
+# Entidades HTML que quedan tras html.unescape (doble escape)
+_HTML_FIXES = {
+    '&#269;': 'c',
+    '&#305;': 'i',
+    '&#345;': 'r',
+    '&#8217;': "'",
+    '&#8230;': '...',
+}
+
+# Los caracteres sueltos se reemplazan con str.translate (una pasada en C)
+_TRANS_TABLE = str.maketrans(_CHAR_REPLACEMENTS)
+
+# Con solo claves no ASCII, un campo ASCII no necesita pasar por translate
+_ASCII_REPLACEMENTS = any(key.isascii() for key in _CHAR_REPLACEMENTS)
+
+# Alternancia precompilada para las entidades de doble escape
+_HTML_FIX_RE = re.compile("|".join(re.escape(key) for key in _HTML_FIXES))
+
+# Etiquetas HTML en una sola pasada: <br>, <br/> y <br /> (grupo 1) pasan
+# a espacio, el resto se elimina
+_TAG_RE = re.compile(r'<(?:(br\s*/?)|[^>]+)>')
+_WS_RE = re.compile(r'\s+')
+
+# Campo que la limpieza dejaría igual: ASCII imprimible sin '&' ni '<' ni
+# claves de reemplazo, sin espacios en los extremos ni espacios repetidos
+_CLEAN_CHARS = "[" + re.escape("".join(
+    char for char in map(chr, range(0x21, 0x7F)) if char not in '&<' and char not in _CHAR_REPLACEMENTS
+)) + "]+"
+_CLEAN_FIELD_RE = re.compile(
+    f"(?:{_CLEAN_CHARS}(?: {_CLEAN_CHARS})*)?" if ' ' not in _CHAR_REPLACEMENTS else f"(?:{_CLEAN_CHARS})?"
+)
+
+# Buffer de 1 MiB para la escritura secuencial del CSV limpio
+_IO_BUFSIZE = 1 << 20
+
+# Valores distintos recordados por la caché de limpieza de campos
+_CLEAN_CACHE_SIZE = 131072
+
+# Largo máximo de un valor cacheado: los textos largos (descripciones) rara
+# vez se repiten y solo inflarían la memoria retenida por la caché
+_CLEAN_CACHE_MAX_LEN = 256
+
+# Filas acumuladas antes de cada escritura en bloque
+_WRITE_BLOCK_ROWS = 10_000
+
+# Fin de línea de csv.writer (dialecto excel)
+_LINE_TERMINATOR = '\r\n'
+
+# Lotes en vuelo por proceso (acota la memoria sin dejar procesos ociosos)
+_BATCHES_PER_WORKER = 2
+
+# Errores de fila que se escriben en el log (el resto solo se cuenta)
+_MAX_ROW_WARNINGS = 10
+
+# El logging se configura en la primera instancia, no al importar
+_LOG_CONFIGURED = False
+
+
+def _configure_logging() -> None:
+    """Configura el logging del limpiador una sola vez por proceso."""
+    global _LOG_CONFIGURED
+    if _LOG_CONFIGURED:
+        return
+    
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('dataset_cleaning.log'),
+            logging.StreamHandler()
+        ]
+    )
+    _LOG_CONFIGURED = True
+
+
+def _lookup_html_fix(match: re.Match) -> str:
+    """Retorna el reemplazo de una entidad encontrada."""
+    return _HTML_FIXES[match.group(0)]
+
+
+def _replace_tag(match: re.Match) -> str:
+    """Retorna el reemplazo de una etiqueta: espacio para <br>, nada para el resto."""
+    return ' ' if match.group(1) is not None else ''
+
+
+def _clean_uncached(text: str) -> str:
+    """Limpia un campo: Unicode, entidades/etiquetas HTML y espacios."""
+    if not text:
+        return text
+    
+    # Entidades y etiquetas solo si aparece su carácter inicial
+    if '&' in text:
+        text = html.unescape(text)
+    
+    # Si ninguna clave es ASCII, un campo ASCII (el caso común) no
+    # necesita recorrerse
+    if _ASCII_REPLACEMENTS or not text.isascii():
+        text = text.translate(_TRANS_TABLE)
+    
+    if '&' in text:
+        text = _HTML_FIX_RE.sub(_lookup_html_fix, text)
+    
+    if '<' in text:
+        text = _TAG_RE.sub(_replace_tag, text)
+    
+    return _WS_RE.sub(' ', text).strip()
+
+
+# Los valores cortos repetidos (columnas categóricas) se limpian una sola
+# vez por proceso
+_clean_cached = lru_cache(maxsize=_CLEAN_CACHE_SIZE)(_clean_uncached)
+
+
+def _clean_text(text: str) -> str:
+    """Limpia un campo, usando la caché solo para los valores cortos."""
+    if len(text) <= _CLEAN_CACHE_MAX_LEN:
+        return _clean_cached(text)
+    return _clean_uncached(text)
+
+
+def _clean_fields(fields: List[str]) -> List[str]:
+    """Limpia los campos de una fila; las filas ya limpias se devuelven tal cual."""
+    if all(map(_CLEAN_FIELD_RE.fullmatch, fields)):
+        return fields
+    return list(map(_clean_text, fields))
+
+
+def _correction_stats(rows: List[List[str]]) -> Dict[str, int]:
+    """
+    Cuenta las correcciones de un conjunto de filas en bloque: las búsquedas
+    recorren una sola vez el texto unido de todas las filas, no fila a fila.
+    """
+    fields = list(chain.from_iterable(rows))
+    with_entities = [field for field in fields if '&' in field]
+    
+    text = '\n'.join(fields)
+    if with_entities:
+        text = html.unescape(text)
+    
+    return {
+        'html_entities_fixed': sum(map(ne, with_entities, map(html.unescape, with_entities))),
+        'character_replacements': (sum(map(text.count, _CHAR_REPLACEMENTS))
+                                   + len(_HTML_FIX_RE.findall(text)))
+    }
+
+
+def clean_batch(rows: List[List[str]]) -> Tuple[List[Optional[List[str]]], Dict[str, int], List[str]]:
+    """
+    Limpia un lote de filas (se ejecuta en un proceso trabajador).
+    
+    Args:
+        rows: Filas ya separadas en campos
+    
+    Returns:
+        Tupla (filas limpias en el mismo orden, None si la fila se omite
+        por vacía o por error; contadores de correcciones; mensajes de error)
+    """
+    cleaned = []
+    errors = []
+    dirty = []  # Filas modificadas: sus correcciones se cuentan al final
+    non_empty_fields = 0
+    
+    for fields in rows:
+        # Filas vacías o solo con espacios
+        if not fields or (len(fields) == 1 and not fields[0].strip()):
+            cleaned.append(None)
+            continue
+        
+        non_empty_fields += len(fields) - fields.count('')
+        try:
+            cleaned_fields = _clean_fields(fields)
+        except Exception as e:
+            cleaned.append(None)
+            errors.append(str(e))
+            continue
+        
+        cleaned.append(cleaned_fields)
+        if cleaned_fields is not fields:
+            dirty.append(fields)
+    
+    stats = _correction_stats(dirty)
+    stats['whitespace_normalized'] = non_empty_fields
+    return cleaned, stats, errors
 
 
 class GenericDatasetCleaner:
@@ -18,7 +225,8 @@ class GenericDatasetCleaner:
     Limpiador genérico que se adapta a cualquier dataset.
     """
 
-    def __init__(self, input_file: str, output_file: str, config: Dict[str, Any]):
+    def __init__(self, input_file: str, output_file: str, config: Dict[str, Any],
+                 max_workers: int = None, source: BatchSource = None, batch_size: int = None):
         """
         Inicializa el limpiador con configuración automática.
         
@@ -26,21 +234,20 @@ class GenericDatasetCleaner:
             input_file: Ruta del archivo original
             output_file: Ruta del archivo limpio
             config: Diccionario con configuración (delimiter, quotechar, encoding, etc.)
+            max_workers: Procesos para limpiar filas (por defecto, número de CPUs)
+            source: Fuente de lotes ya abierta sobre input_file (compartida con
+                el análisis); por defecto se crea una nueva
+            batch_size: Filas por lote si se crea la fuente
         """
         self.input_file = input_file
         self.output_file = output_file
         self.config = config
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.source = source or BatchSource(input_file, config, batch_size, self.max_workers)
         
-        # Configurar logging
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler('dataset_cleaning.log'),
-                logging.StreamHandler()
-            ]
-        )
+        _configure_logging()
         self.logger = logging.getLogger(__name__)
+        self._error_count = 0
 
         # Estadísticas
         self.stats = {
@@ -52,102 +259,100 @@ class GenericDatasetCleaner:
             'whitespace_normalized': 0
         }
 
-        # Diccionario de reemplazos
-        self.char_replacements = {
-            '"': '"',  # Comilla izquierda
-            '"': '"',  # Comilla derecha
-            ''': "'",  # Apóstrofo izquierdo
-            ''': "'",  # Apóstrofo derecho
-            '–': "-",  # Guion medio
-            '—': "-",  # Guion largo
-            ' ': " ",  # Espacio no rompible
-            '…': "...",  # Puntos suspensivos
-            '®': "(R)",  # Signo de registro
-            '©': "(C)",  # Signo de derechos de autor
-            '™': "(TM)",  # Marca registrada
-        }
+        # Tablas de reemplazo (a nivel de módulo para los procesos trabajadores)
+        self.char_replacements = _CHAR_REPLACEMENTS
+        self.html_fixes = _HTML_FIXES
 
-    def normalize_unicode(self, text: str) -> str:
-        """Normaliza caracteres Unicode."""
-        if not text:
-            return text
-        
-        normalized = unicodedata.normalize('NFD', text)
-        
-        for old_char, new_char in self.char_replacements.items():
-            if old_char in normalized:
-                normalized = normalized.replace(old_char, new_char)
-                self.stats['character_replacements'] += 1
-        
-        return normalized
+    def _warn_row(self, message: str) -> None:
+        """Registra un error de fila; solo se escriben los primeros."""
+        self._error_count += 1
+        if self._error_count <= _MAX_ROW_WARNINGS:
+            self.logger.warning(message)
+
+    def clean_field(self, text: str) -> str:
+        """Limpia un campo: Unicode, entidades/etiquetas HTML y espacios."""
+        return _clean_text(text)
 
-    def clean_html_entities(self, text: str) -> str:
-        """Limpia entidades HTML."""
-        if not text:
-            return text
+    def clean_row(self, fields: List[str]) -> Tuple[List[str], bool]:
+        """Limpia una fila completa (campos ya separados por csv.reader)."""
+        try:
+            cleaned_fields = _clean_fields(fields)
+            
+            self.stats['whitespace_normalized'] += len(fields) - fields.count('')
+            if cleaned_fields is not fields:
+                for key, value in _correction_stats([fields]).items():
+                    self.stats[key] += value
+            
+            return cleaned_fields, True
         
-        text = html.unescape(text)
+        except Exception as e:
+            self._warn_row(f"Error limpiando fila: {str(e)[:100]}...")
+            return [], False
+
+    def _clean_rows(self, rows: List[List[str]]) -> Tuple[List[Optional[List[str]]], Dict[str, int], List[str]]:
+        """
+        Limpia un lote llamando a clean_row en cada fila (para subclases).
         
-        html_fixes = {
-            '&#269;': 'c',
-            '&#305;': 'i',
-            '&#345;': 'r',
-            '&#8217;': "'",
-            '&#8230;': '...',
-        }
+        clean_row ya acumula sus contadores y registra sus errores, así que
+        el resultado, con la forma de clean_batch, no trae ninguno.
+        """
+        cleaned = []
+        for fields in rows:
+            # Filas vacías o solo con espacios
+            if not fields or (len(fields) == 1 and not fields[0].strip()):
+                cleaned.append(None)
+                continue
+            
+            cleaned_fields, success = self.clean_row(fields)
+            cleaned.append(cleaned_fields if success and cleaned_fields else None)
         
-        for entity, replacement in html_fixes.items():
-            if entity in text:
-                text = text.replace(entity, replacement)
-                self.stats['html_entities_fixed'] += 1
+        return cleaned, {}, []
+
+    def _write_batch(self, outfile, csv_writer,
+                     result: Tuple[List[Optional[List[str]]], Dict[str, int], List[str]]) -> None:
+        """
+        Escribe un lote limpio y acumula sus estadísticas.
         
-        text = re.sub(r'<br\s*/?>', ' ', text)
-        text = re.sub(r'<[^>]+>', '', text)
+        Las filas que no requieren comillas se unen directamente con el
+        delimitador y se escriben en bloques; el resto pasa por csv.writer.
+        """
+        cleaned, stats, errors = result
+        delimiter = self.config['delimiter']
         
-        return text
-
-    def normalize_whitespace(self, text: str) -> str:
-        """Normaliza espacios en blanco."""
-        if not text:
-            return text
+        for key, value in stats.items():
+            self.stats[key] += value
+        for error in errors:
+            self._warn_row(f"Error limpiando fila: {error[:100]}...")
         
-        text = re.sub(r'\s+', ' ', text)
-        text = text.strip()
-        self.stats['whitespace_normalized'] += 1
+        # Contadores del lote de una vez, fuera del bucle de escritura
+        skipped = cleaned.count(None)
+        self.stats['total_rows'] += len(cleaned)
+        self.stats['skipped_rows'] += skipped
+        self.stats['cleaned_rows'] += len(cleaned) - skipped
         
-        return text
-
-    def clean_row(self, row_data: str) -> Tuple[List[str], bool]:
-        """Limpia una fila completa."""
-        try:
-            import io
-            delimiter = self.config['delimiter']
-            quotechar = self.config['quotechar']
-            
-            csv_reader = csv.reader(
-                io.StringIO(row_data),
-                quotechar=quotechar,
-                delimiter=delimiter
-            )
+        lines = []
+        for cleaned_fields in cleaned:
+            if cleaned_fields is None:
+                continue
             
-            try:
-                fields = next(csv_reader)
-            except (csv.Error, StopIteration):
-                fields = row_data.split(delimiter)
+            line = delimiter.join(cleaned_fields)
             
-            cleaned_fields = []
-            for field in fields:
-                cleaned_field = field
-                cleaned_field = self.normalize_unicode(cleaned_field)
-                cleaned_field = self.clean_html_entities(cleaned_field)
-                cleaned_field = self.normalize_whitespace(cleaned_field)
-                cleaned_fields.append(cleaned_field)
-            
-            return cleaned_fields, True
+            # Sin delimitador, comillas ni saltos dentro de los campos la
+            # salida es idéntica a la de csv.writer (QUOTE_MINIMAL)
+            if (line.count(delimiter) == len(cleaned_fields) - 1 and line
+                    and '"' not in line and '\n' not in line and '\r' not in line):
+                lines.append(line + _LINE_TERMINATOR)
+                if len(lines) >= _WRITE_BLOCK_ROWS:
+                    outfile.writelines(lines)
+                    lines = []
+            else:
+                outfile.writelines(lines)
+                lines = []
+                csv_writer.writerow(cleaned_fields)
         
-        except Exception as e:
-            self.logger.warning(f"Error limpiando fila: {str(e)[:100]}...")
-            return [], False
+        outfile.writelines(lines)
+        
+        self.logger.info(f"Procesadas {self.stats['total_rows']:,} filas...")
 
     def process_file(self) -> Dict[str, Any]:
         """Procesa el archivo completo."""
@@ -155,11 +360,11 @@ class GenericDatasetCleaner:
         
         temp_output = self.output_file + '.tmp'
         delimiter = self.config['delimiter']
-        quotechar = self.config['quotechar']
-        encoding = self.config['encoding']
+        source = self.source
         
-        with open(self.input_file, 'r', encoding=encoding) as infile, \
-             open(temp_output, 'w', encoding='utf-8', newline='') as outfile:
+        # Un único lector para todo el archivo (sin reparsear línea a línea)
+        with source, \
+             open(temp_output, 'w', encoding='utf-8', newline='', buffering=_IO_BUFSIZE) as outfile:
             
             csv_writer = csv.writer(
                 outfile,
@@ -167,41 +372,49 @@ class GenericDatasetCleaner:
                 delimiter=delimiter
             )
             
-            for line_num, line in enumerate(infile, 1):
+            # Header
+            if source.header is not None:
                 self.stats['total_rows'] += 1
-                line = line.rstrip('\n\r')
-                
-                if line_num == 1:
-                    # Header
-                    header_fields = line.split(delimiter)
-                    csv_writer.writerow(header_fields)
-                    self.stats['cleaned_rows'] += 1
-                    continue
-                
-                if not line.strip():
-                    self.stats['skipped_rows'] += 1
-                    continue
-                
-                cleaned_fields, success = self.clean_row(line)
-                
-                if success and len(cleaned_fields) > 0:
-                    csv_writer.writerow(cleaned_fields)
-                    self.stats['cleaned_rows'] += 1
-                else:
-                    self.stats['skipped_rows'] += 1
-                
-                if line_num % 10000 == 0:
-                    self.logger.info(f"Procesadas {line_num:,} filas...")
-        
-        # Renombrar archivo temporal
+                csv_writer.writerow(source.header)
+                self.stats['cleaned_rows'] += 1
+            
+            batches = source.batches()
+            
+            if type(self).clean_row is not GenericDatasetCleaner.clean_row:
+                # Subclase que redefine clean_row: fila por fila en este proceso
+                for batch in batches:
+                    self._write_batch(outfile, csv_writer, self._clean_rows(batch))
+            elif self.max_workers == 1 or self.config.get('rows', 0) <= source.batch_size:
+                # Un solo lote: no compensa levantar procesos
+                for batch in batches:
+                    self._write_batch(outfile, csv_writer, clean_batch(batch))
+            else:
+                # Los resultados se escriben en el orden de envío
+                with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                    in_flight = deque()
+                    for batch in batches:
+                        in_flight.append(executor.submit(clean_batch, batch))
+                        if len(in_flight) >= self.max_workers * _BATCHES_PER_WORKER:
+                            self._write_batch(outfile, csv_writer, in_flight.popleft().result())
+                    while in_flight:
+                        self._write_batch(outfile, csv_writer, in_flight.popleft().result())
+        
+        # Filas que csv no pudo leer
+        for error in source.read_errors:
+            self.stats['total_rows'] += 1
+            self.stats['skipped_rows'] += 1
+            self._warn_row(f"Error leyendo fila: {error[:100]}...")
+        
+        # Renombrar archivo temporal (reemplazo atómico del destino)
         try:
-            if os.path.exists(self.output_file):
-                os.remove(self.output_file)
-            shutil.move(temp_output, self.output_file)
+            os.replace(temp_output, self.output_file)
         except Exception as e:
             self.logger.error(f"Error renombrando archivo: {str(e)}")
             raise
         
+        if self._error_count > _MAX_ROW_WARNINGS:
+            self.logger.warning(f"{self._error_count - _MAX_ROW_WARNINGS:,} errores de fila más no mostrados")
+        
         self.logger.info(f"Limpieza completada. Archivo guardado: {self.output_file}")
         return self.stats
 
@@ -9,6 +9,7 @@ import argparse
 from datetime import datetime
 from pathlib import Path
 
+from batch_source import BatchSource, MIN_BATCH_SIZE
 from config import DatasetConfig
 from generic_analyzer import GenericDatasetAnalyzer
 from generic_cleaner import GenericDatasetCleaner
@@ -20,7 +21,8 @@ class GenericDataPipeline:
     Pipeline automático y genérico para cualquier dataset CSV.
     """
 
-    def __init__(self, input_file: str, output_dir: str = None, force_clean: bool = False):
+    def __init__(self, input_file: str, output_dir: str = None, force_clean: bool = False,
+                 batch_size: int = None, max_workers: int = None):
         """
         Inicializa el pipeline.
         
@@ -28,11 +30,16 @@ class GenericDataPipeline:
             input_file: Ruta del archivo CSV a procesar
             output_dir: Directorio de salida (por defecto, mismo que input)
             force_clean: Forzar limpieza incluso si no hay problemas detectados
+            batch_size: Filas por lote entre etapas (por defecto, filas / procesos)
+            max_workers: Procesos para limpiar filas (por defecto, número de CPUs)
         """
         self.input_file = input_file
         self.output_dir = output_dir or os.path.dirname(input_file) or '.'
         self.force_clean = force_clean
+        self.batch_size = batch_size
+        self.max_workers = max_workers
         self.config = None
+        self.source = None
         self.start_time = datetime.now()
         self.execution_log = []
 
@@ -85,7 +92,7 @@ class GenericDataPipeline:
         try:
             self.log_step("Análisis de Calidad", "INFO", "Analizando calidad de datos...")
             
-            analyzer = GenericDatasetAnalyzer(self.input_file, self.config)
+            analyzer = GenericDatasetAnalyzer(self.input_file, self.config, source=self.source)
             analyzer.analyze_file_structure()
             analyzer.analyze_separators()
             analyzer.analyze_character_encoding()
@@ -117,7 +124,8 @@ class GenericDataPipeline:
             
             output_file = os.path.join(self.output_dir, 'Dataset_cleaned.csv')
             
-            cleaner = GenericDatasetCleaner(self.input_file, output_file, self.config)
+            cleaner = GenericDatasetCleaner(self.input_file, output_file, self.config,
+                                            max_workers=self.max_workers, source=self.source)
             stats = cleaner.process_file()
             
             report = cleaner.generate_report()
@@ -184,15 +192,20 @@ class GenericDataPipeline:
         
         print()
         
-        # Paso 2: Analizar dataset
-        if not self.analyze_dataset():
-            return False
-        
-        print()
-        
-        # Paso 3: Limpiar dataset
-        if not self.clean_dataset():
-            return False
+        # Análisis y limpieza comparten una sola lectura por lotes del archivo
+        self.source = BatchSource(self.input_file, self.config, self.batch_size, self.max_workers)
+        try:
+            # Paso 2: Analizar dataset
+            if not self.analyze_dataset():
+                return False
+            
+            print()
+            
+            # Paso 3: Limpiar dataset
+            if not self.clean_dataset():
+                return False
+        finally:
+            self.source.close()
         
         print()
         
@@ -217,6 +230,11 @@ def main():
     parser.add_argument('-o', '--output', help='Directorio de salida')
     parser.add_argument('-f', '--force', action='store_true', 
                        help='Forzar limpieza incluso sin problemas detectados')
+    parser.add_argument('-b', '--batch-size', type=int,
+                       help='Filas por lote entre etapas (default: filas / procesos, '
+                            f'mínimo {MIN_BATCH_SIZE:,})')
+    parser.add_argument('-w', '--workers', type=int,
+                       help='Procesos para limpiar filas (default: número de CPUs)')
     
     args = parser.parse_args()
     
@@ -227,7 +245,9 @@ def main():
     pipeline = GenericDataPipeline(
         args.input_file,
         args.output,
-        args.force
+        args.force,
+        args.batch_size,
+        args.workers
     )
     
     success = pipeline.execute()
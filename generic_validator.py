@@ -3,8 +3,72 @@ Validador genérico de datasets CSV
 """
 
 import csv
+import io
 import re
-from typing import Dict, Any
+from itertools import chain
+from typing import Dict, Any, Iterator, List, Type
+
+from _regex import HTML_ENTITY_RE
+from config import config_dialect
+
+
+# Caracteres no ASCII fuera de las letras españolas permitidas
+_NON_ASCII_RE = re.compile(r'[^\x00-\x7FáéíóúñüÁÉÍÓÚÑÜ]')
+
+# Comienzo de entidad HTML que puede continuar en el bloque siguiente
+_PARTIAL_ENTITY_RE = re.compile(r'&(?:[a-zA-Z]*|#\d*)')
+
+# Caracteres por bloque al recorrer el archivo limpio
+_CHUNK_CHARS = 8 * 1024 * 1024
+
+# Bloque de lectura binaria para contar registros
+_COUNT_CHUNK = 1 << 20
+
+
+def _parse_record(lines: Iterator[bytes], encoding: str, dialect: Type[csv.Dialect]) -> List[str]:
+    """Lee un registro CSV de un iterador de líneas binarias."""
+    # csv.reader pide líneas solo hasta completar el registro, así que un
+    # campo multilínea consume exactamente sus líneas
+    decoded = (line.decode(encoding) for line in lines)
+    return next(csv.reader(decoded, dialect=dialect))
+
+
+def _count_records(path: str, encoding: str, dialect: Type[csv.Dialect]) -> int:
+    """
+    Cuenta los registros CSV de un archivo (un campo entre comillas puede
+    abarcar varias líneas).
+    
+    En binario y por bloques: un bloque sin comillas se cuenta por sus saltos
+    de línea; en el resto, las líneas con comillas pasan por csv.reader.
+    """
+    quote_byte = dialect.quotechar.encode(encoding)
+    count = 0
+    with open(path, 'rb', buffering=_COUNT_CHUNK) as f:
+        while chunk := f.read(_COUNT_CHUNK):
+            # Cortar el bloque en un salto de línea
+            if not chunk.endswith(b'\n'):
+                chunk += f.readline()
+            
+            if quote_byte not in chunk:
+                count += chunk.count(b'\n')
+                # Una última línea sin salto final también cuenta
+                if not chunk.endswith(b'\n'):
+                    count += 1
+                continue
+            
+            lines = io.BytesIO(chunk)
+            for line in lines:
+                count += 1
+                if quote_byte in line:
+                    # El registro puede seguir en el bloque o en el archivo
+                    _parse_record(chain([line], lines, f), encoding, dialect)
+    return count
+
+
+def _skeleton_deletions(delimiter: bytes) -> bytes:
+    """Bytes a borrar de un bloque para dejar solo delimitadores y saltos de línea."""
+    keep = {delimiter[0], ord('\n')}
+    return bytes(b for b in range(256) if b not in keep)
 
 
 class GenericDatasetValidator:
@@ -39,28 +103,69 @@ class GenericDatasetValidator:
         }
         
         try:
-            delimiter = self.config['delimiter']
-            quotechar = self.config['quotechar']
+            dialect = config_dialect(self.config)
+            delimiter_byte = dialect.delimiter.encode('utf-8')
+            quote_byte = dialect.quotechar.encode('utf-8')
             
-            with open(self.cleaned_file, 'r', encoding='utf-8') as f:
-                reader = csv.reader(f, delimiter=delimiter, quotechar=quotechar)
-                
-                header = next(reader)
+            def parse(lines: Iterator[bytes]) -> List[str]:
+                return _parse_record(lines, 'utf-8', dialect)
+            
+            # En binario y por bloques: un bloque sin comillas se reduce a sus
+            # delimitadores y saltos de línea (bytes.translate) y se compara
+            # con el esqueleto esperado; si no coincide se revisa línea a
+            # línea y solo los registros con comillas pasan por csv.reader
+            with open(self.cleaned_file, 'rb', buffering=_COUNT_CHUNK) as f:
+                header = parse(f)
                 expected_columns = len(header)
                 results['total_columns'] = expected_columns
                 results['header'] = header
                 
-                for row_num, row in enumerate(reader, 2):
-                    results['total_rows'] += 1
+                # Con una sola columna una línea vacía no se distingue por
+                # delimitadores; con delimitadores multibyte tampoco sirve
+                deletions = None
+                if len(delimiter_byte) == 1 and expected_columns > 1:
+                    deletions = _skeleton_deletions(delimiter_byte)
+                    skeleton_line = delimiter_byte * (expected_columns - 1) + b'\n'
+                row_num = 1
+                
+                while chunk := f.read(_COUNT_CHUNK):
+                    # Cortar el bloque en un salto de línea
+                    if not chunk.endswith(b'\n'):
+                        chunk += f.readline()
+                    
+                    # Validar UTF-8 (el bloque no parte caracteres multibyte)
+                    if not chunk.isascii():
+                        chunk.decode('utf-8')
                     
-                    if len(row) != expected_columns:
-                        results['consistent_columns'] = False
-                        results['errors'].append(
-                            f"Fila {row_num}: {len(row)} columnas (esperadas: {expected_columns})"
-                        )
+                    if deletions is not None and quote_byte not in chunk:
+                        skeleton = chunk.translate(None, deletions)
+                        if not chunk.endswith(b'\n'):
+                            skeleton += b'\n'
+                        rows = len(skeleton) // len(skeleton_line)
+                        if skeleton == skeleton_line * rows:
+                            results['total_rows'] += rows
+                            row_num += rows
+                            continue
+                    
+                    lines = io.BytesIO(chunk)
+                    for line in lines:
+                        row_num += 1
+                        results['total_rows'] += 1
+                        
+                        if quote_byte in line:
+                            # El registro puede seguir en el bloque o en el archivo
+                            columns = len(parse(chain([line], lines, f)))
+                        else:
+                            line = line.rstrip(b'\r\n')
+                            columns = line.count(delimiter_byte) + 1 if line else 0
                         
-                        if len(results['errors']) >= 10:
-                            break
+                        # Se guardan las 10 primeras diferencias y se sigue contando
+                        if columns != expected_columns:
+                            results['consistent_columns'] = False
+                            if len(results['errors']) < 10:
+                                results['errors'].append(
+                                    f"Fila {row_num}: {columns} columnas (esperadas: {expected_columns})"
+                                )
         
         except Exception as e:
             results['is_valid_csv'] = False
@@ -92,21 +197,32 @@ class GenericDatasetValidator:
             'encoding_issues': []
         }
         
-        with open(self.cleaned_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # Buscar caracteres problemáticos
         problematic_chars = set()
-        for char in content:
-            if ord(char) > 127 and char not in 'áéíóúñüÁÉÍÓÚÑÜ':
-                problematic_chars.add(char)
+        html_entities_count = 0
+        tail = ''
         
-        results['problematic_chars_found'] = len(problematic_chars)
+        # Leer por bloques: memoria constante sin importar el tamaño del archivo
+        with open(self.cleaned_file, 'r', encoding='utf-8') as f:
+            while chunk := f.read(_CHUNK_CHARS):
+                content = tail + chunk
+                tail = ''
+                
+                # Una entidad cortada al final del bloque se completa en el siguiente
+                amp = content.rfind('&')
+                if amp != -1 and _PARTIAL_ENTITY_RE.fullmatch(content, amp):
+                    content, tail = content[:amp], content[amp:]
+                
+                # Buscar caracteres problemáticos (un bloque ASCII, el caso
+                # común, se descarta con un solo recorrido en C)
+                if not content.isascii():
+                    problematic_chars.update(_NON_ASCII_RE.findall(content))
+                
+                # Buscar entidades HTML
+                if '&' in content:
+                    html_entities_count += len(HTML_ENTITY_RE.findall(content))
         
-        # Buscar entidades HTML
-        html_pattern = re.compile(r'&[a-zA-Z]+;|&#\d+;')
-        html_entities = html_pattern.findall(content)
-        results['html_entities_found'] = len(html_entities)
+        results['problematic_chars_found'] = len(problematic_chars)
+        results['html_entities_found'] = html_entities_count
         
         if results['problematic_chars_found'] == 0:
             print(f"✓ No hay caracteres problemáticos")
@@ -132,22 +248,20 @@ class GenericDatasetValidator:
             'data_preserved': True
         }
         
-        # Contar filas originales
+        dialect = config_dialect(self.config)
+        
+        # Contar registros originales (no líneas: el limpio escribe cada
+        # registro multilínea en una sola línea)
         try:
-            with open(self.original_file, 'r', encoding=self.config['encoding']) as f:
-                results['original_rows'] = sum(1 for _ in f) - 1  # Restar header
+            results['original_rows'] = _count_records(
+                self.original_file, self.config['encoding'], dialect) - 1  # Restar header
         except Exception as e:
             print(f"⚠ Error leyendo original: {e}")
         
-        # Contar filas limpias
+        # Contar registros limpios
         try:
-            delimiter = self.config['delimiter']
-            quotechar = self.config['quotechar']
-            
-            with open(self.cleaned_file, 'r', encoding='utf-8') as f:
-                reader = csv.reader(f, delimiter=delimiter, quotechar=quotechar)
-                next(reader)  # Skip header
-                results['cleaned_rows'] = sum(1 for _ in reader)
+            results['cleaned_rows'] = _count_records(
+                self.cleaned_file, 'utf-8', dialect) - 1  # Restar header
         except Exception as e:
             print(f"⚠ Error leyendo limpio: {e}")
         
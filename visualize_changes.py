@@ -6,21 +6,268 @@ Muestra cambios de forma clara y organizada
 """
 
 import csv
+import io
 import sys
 from pathlib import Path
-from typing import List, Dict, Tuple
-from collections import defaultdict
+from typing import Any, Iterable, Iterator, List, Dict, TextIO, Tuple
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, compress, islice
+from operator import ne, not_
 import argparse
 
+try:
+    # Lector CSV de pyarrow (C++, multihilo) si está instalado
+    import pyarrow as pa
+    from pyarrow import csv as pacsv
+except ImportError:
+    pa = pacsv = None
+
+
+# Tipos de cambio; _classify_change retorna el índice en esta tupla
+CHANGE_TYPES = ("Relleno", "Vaciado", "Reducción", "Expansión", "Espacios", "Caracteres")
+
+# Buffer de lectura de los CSV comparados
+_IO_BUFSIZE = 1 << 20
+
+# Bloque de lectura del lector de pyarrow
+_ARROW_BLOCK_SIZE = 1 << 22
+
+# Caracteres de cada valor que se muestran en consola
+_SHOWN_CHARS = 60
+
+# Recuadros de título de la consola (ancho fijo de 78), con una línea en
+# blanco antes y después
+_BOX_TOP = "╔" + "═" * 78 + "╗"
+_BOX_BOTTOM = "╚" + "═" * 78 + "╝"
+_SUMMARY_BOX = f"\n{_BOX_TOP}\n║{'RESUMEN DE CAMBIOS'.center(78)}║\n{_BOX_BOTTOM}\n"
+_EMPTY_CELLS_BOX = f"\n{_BOX_TOP}\n║{'ANÁLISIS DE VALORES VACÍOS POR COLUMNA'.center(78)}║\n{_BOX_BOTTOM}\n"
+
+# Filas por lote enviado a un proceso trabajador
+_BATCH_ROWS = 50_000
+
+# Lotes en vuelo por proceso (acota la memoria sin dejar procesos ociosos)
+_BATCHES_PER_WORKER = 2
+
+# Contadores de compare_rows que pasan directamente a stats
+_COUNTER_KEYS = ('total_rows', 'changed_rows', 'changed_cells', 'char_removed',
+                 'char_added', 'empty_cells_original', 'empty_cells_cleaned')
+
+
+def _open_csv(filepath: str) -> io.TextIOWrapper:
+    """Abre un CSV como texto sobre un buffer binario grande (newline='' para csv)"""
+    raw = open(filepath, 'rb', buffering=_IO_BUFSIZE)
+    return io.TextIOWrapper(raw, encoding='utf-8', newline='')
+
+
+def _fast_pairs(f_clean: io.BufferedReader, f_orig: io.BufferedReader,
+                delimiter: str) -> Iterator[Tuple[List[str], List[str]]]:
+    """
+    Recorre ambos archivos a la par y separa cada línea por el delimitador,
+    sin interpretar comillas.
+
+    Las líneas se comparan en bytes: si son idénticas se decodifican y
+    separan una sola vez y el par lleva la misma fila (el caso común).
+    """
+    # El limpio va primero en zip: si se agota antes, la línea pendiente
+    # del original no se consume y se cuenta entre las restantes
+    for clean_line, orig_line in zip(f_clean, f_orig):
+        clean_row = clean_line.decode('utf-8').rstrip('\r\n').split(delimiter)
+        if orig_line == clean_line:
+            yield clean_row, clean_row
+        else:
+            yield clean_row, orig_line.decode('utf-8').rstrip('\r\n').split(delimiter)
+
+
+def _arrow_reader(filepath: str, header: List[str], delimiter: str) -> Iterator[Tuple[str, ...]]:
+    """Recorre las filas de datos con pyarrow, todas las columnas como texto"""
+    # Nombres propios: el encabezado puede tener nombres repetidos o vacíos
+    names = [f"c{col_idx}" for col_idx in range(len(header))]
+    reader = pacsv.open_csv(
+        filepath,
+        read_options=pacsv.ReadOptions(block_size=_ARROW_BLOCK_SIZE, skip_rows=1,
+                                       column_names=names),
+        parse_options=pacsv.ParseOptions(delimiter=delimiter, quote_char='"',
+                                         newlines_in_values=True),
+        convert_options=pacsv.ConvertOptions(column_types=dict.fromkeys(names, pa.string()),
+                                             strings_can_be_null=False,
+                                             quoted_strings_can_be_null=False)
+    )
+    # Cada lote columnar se convierte a filas en C (to_pylist + zip)
+    for batch in reader:
+        yield from zip(*(column.to_pylist() for column in batch.columns))
+
+
+def _classify_change(original: str, cleaned: str, orig_empty: bool,
+                     clean_empty: bool, orig_strip_eq: bool) -> int:
+    """Clasifica el tipo de cambio (retorna su índice en CHANGE_TYPES)"""
+    # Detectar si es cambio de vacío a lleno o viceversa
+    if orig_empty and not clean_empty:
+        return 0  # Relleno
+    elif not orig_empty and clean_empty:
+        return 1  # Vaciado
+    elif len(original) > len(cleaned):
+        return 2  # Reducción
+    elif len(original) < len(cleaned):
+        return 3  # Expansión
+    elif not orig_strip_eq:
+        return 4  # Espacios
+    else:
+        return 5  # Caracteres
+
+
+def compare_rows(pairs: Iterable[Tuple[List[str], List[str]]], first_row: int,
+                 header: List[str], limit: int, keep_all: bool) -> Dict[str, Any]:
+    """
+    Compara un tramo de filas (se ejecuta en proceso o en un trabajador).
+
+    Args:
+        pairs: Pares (fila limpia, fila original) en orden
+        first_row: Índice (desde 0) de la primera fila del tramo
+        header: Encabezado del original (fija las columnas con estadísticas)
+        limit: Cambios del tramo que se devuelven con su detalle
+        keep_all: Devolver el detalle de todos los cambios con los valores
+            completos (si no, los valores se recortan a lo que se muestra)
+
+    Returns:
+        Contadores del tramo (Counter, incluye los tipos de cambio por
+        nombre), cambios como tuplas (fila, columna, original,
+        limpio, tipo), ubicaciones (fila, columna) del resto y estadísticas
+        por columna
+    """
+    # Contadores en variables locales
+    changed_rows = 0
+    total_rows = 0
+    changed_cells = 0
+    char_removed = 0
+    char_added = 0
+    empty_original = 0
+    empty_cleaned = 0
+    type_counts = [0] * len(CHANGE_TYPES)
+    changes = []
+    remaining = []
+
+    # Estadísticas por columna
+    num_header = len(header)
+    empty_by_col = [0] * num_header
+    samples = [[] for _ in header]
+    # Columnas que aún buscan valores de ejemplo: cada una sale de la lista
+    # al juntar sus 3 primeros valores (una deque(maxlen=3) guardaría los últimos)
+    sampling = list(range(num_header))
+    row_widths = Counter()
+
+    def update_column_stats(clean_row: List[str], clean_stripped: List[str]) -> None:
+        num_cols = len(clean_row)
+        row_widths[num_cols] += 1
+
+        # Python solo recorre las celdas vacías (si la fila tiene alguna)
+        if '' in clean_stripped:
+            for col_idx in compress(range(num_cols), map(not_, clean_stripped)):
+                if col_idx < num_header:
+                    empty_by_col[col_idx] += 1
+
+        # Guardar ejemplos de valores (solo en columnas con menos de 3)
+        if not sampling:
+            return
+        for col_idx in sampling[:]:
+            if col_idx < num_cols and clean_stripped[col_idx]:
+                col_samples = samples[col_idx]
+                col_samples.append(clean_row[col_idx][:50])
+                if len(col_samples) == 3:
+                    sampling.remove(col_idx)
+
+    for row_idx, (clean_row, orig_row) in enumerate(pairs, first_row):
+        total_rows += 1
+
+        # Fila sin cambios (el caso común): la igualdad de listas
+        # corre en C y un solo recorte sirve para ambos archivos
+        if orig_row == clean_row:
+            clean_stripped = list(map(str.strip, clean_row))
+            empty_count = clean_stripped.count('')
+            empty_original += empty_count
+            empty_cleaned += empty_count
+            update_column_stats(clean_row, clean_stripped)
+            continue
+
+        # Solo se comparan las columnas presentes en ambas filas
+        if len(orig_row) != len(clean_row):
+            num_cols = min(len(orig_row), len(clean_row))
+            orig_row, clean_row = orig_row[:num_cols], clean_row[:num_cols]
+
+        # Detectar celdas vacías (strip y conteo corren en C)
+        orig_stripped = list(map(str.strip, orig_row))
+        clean_stripped = list(map(str.strip, clean_row))
+        empty_original += orig_stripped.count('')
+        empty_cleaned += clean_stripped.count('')
+
+        # Actualizar estadísticas por columna
+        update_column_stats(clean_row, clean_stripped)
+
+        # Las celdas modificadas se ubican en C comparando las
+        # filas completas; Python solo recorre las que cambiaron
+        changed_cols = compress(range(len(orig_row)), map(ne, orig_row, clean_row))
+        row_dirty = False
+        for col_idx in changed_cols:
+            orig_val = orig_row[col_idx]
+            clean_val = clean_row[col_idx]
+
+            row_dirty = True
+            changed_cells += 1
+
+            # Determinar tipo de cambio (reutiliza los recortes de la fila)
+            orig_strip = orig_stripped[col_idx]
+            clean_strip = clean_stripped[col_idx]
+            change_code = _classify_change(orig_val, clean_val, not orig_strip,
+                                           not clean_strip, orig_strip == clean_strip)
+            type_counts[change_code] += 1
+
+            # Calcular caracteres
+            char_removed += len(orig_val)
+            char_added += len(clean_val)
+
+            if not keep_all:
+                # Pasado el límite solo se guarda la ubicación
+                if changed_cells > limit:
+                    remaining.append((row_idx + 1, col_idx + 1))
+                    continue
+                # Sin exportación solo se guarda lo que se muestra
+                orig_val, clean_val = orig_val[:_SHOWN_CHARS], clean_val[:_SHOWN_CHARS]
+
+            changes.append((row_idx + 1, col_idx + 1, orig_val, clean_val, change_code))
+
+        if row_dirty:
+            changed_rows += 1
+
+    # Contadores del tramo y por tipo de cambio, listos para sumarse
+    counts = Counter(total_rows=total_rows, changed_rows=changed_rows,
+                     changed_cells=changed_cells, char_removed=char_removed,
+                     char_added=char_added, empty_cells_original=empty_original,
+                     empty_cells_cleaned=empty_cleaned)
+    counts.update(dict(zip(CHANGE_TYPES, type_counts)))
+
+    return {
+        'counts': counts,
+        'changes': changes,
+        'remaining': remaining,
+        'empty_by_col': empty_by_col,
+        'samples': samples,
+        'row_widths': row_widths,
+    }
+
 
 class ChangeAnalyzer:
     """Analiza y visualiza cambios entre archivos"""
 
-    def __init__(self, original: str, cleaned: str, delimiter: str = ';'):
+    def __init__(self, original: str, cleaned: str, delimiter: str = ';',
+                 limit: int = 10, keep_all: bool = False, workers: int = 1,
+                 fast: bool = False, arrow: bool = False):
         self.original = original
         self.cleaned = cleaned
         self.delimiter = delimiter
+        self.limit = limit  # Cambios a mostrar en detalle
+        self.keep_all = keep_all  # Guardar el detalle completo de todos (para exportar)
         self.changes = []
+        self.remaining_by_row = defaultdict(list)  # Fila -> columnas de los cambios no mostrados
         self.empty_cells = []  # Celdas vacías detectadas
         self.stats = {
             'total_rows': 0,
@@ -31,83 +278,129 @@ class ChangeAnalyzer:
             'char_added': 0,
             'empty_cells_original': 0,
             'empty_cells_cleaned': 0,
-            'changes_by_type': defaultdict(int)
+            'changes_by_type': {}
         }
         self.column_stats = {}  # Estadísticas por columna
+        self.workers = workers or 1  # Procesos para comparar lotes de filas
+        self.fast = fast  # Separar por el delimitador sin interpretar comillas
+        self.arrow = arrow and pacsv is not None  # Leer con pyarrow (si está instalado)
+        self._header = []
+        self._counts = Counter()  # Contadores sumados de los tramos comparados
+        self._row_widths = Counter()  # Filas comparadas por cantidad de columnas
     
-    def read_file(self, filepath: str) -> List[List[str]]:
-        """Lee archivo CSV"""
+    def analyze(self) -> None:
+        """Analiza cambios entre archivos"""
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                reader = csv.reader(f, delimiter=self.delimiter, quotechar='"')
-                return list(reader)
+            # Ambos archivos se recorren a la par, fila por fila, sin
+            # cargarlos en memoria
+            with _open_csv(self.original) as f1, _open_csv(self.cleaned) as f2:
+                if self.fast:
+                    # Líneas en bytes, sin pasar por la capa de texto
+                    r1 = f1.buffer
+                    fast_pairs = _fast_pairs(f2.buffer, r1, self.delimiter)
+                    clean_header, header = next(fast_pairs, (None, None))
+                else:
+                    r1 = csv.reader(f1, delimiter=self.delimiter, quotechar='"')
+                    r2 = csv.reader(f2, delimiter=self.delimiter, quotechar='"')
+
+                    header = next(r1, None)
+                    clean_header = next(r2, None)
+
+                if header is None or clean_header is None:
+                    print("❌ Error al leer archivos")
+                    return
+
+                # pyarrow recorre las filas de datos; csv solo leyó el encabezado
+                if self.arrow:
+                    r1 = _arrow_reader(self.original, header, self.delimiter)
+                    r2 = _arrow_reader(self.cleaned, clean_header, self.delimiter)
+
+                self.stats['total_cols'] = len(header)
+
+                # Inicializar estadísticas por columna
+                self._init_column_stats(header)
+
+                # Comparar fila por fila (el encabezado es la fila 0). El
+                # limpio va primero en zip: si se agota antes, no se pierde
+                # ninguna fila del original al contar las restantes
+                if self.fast:
+                    pairs = chain([(clean_header, header)], fast_pairs)
+                else:
+                    pairs = zip(chain([clean_header], r2), chain([header], r1))
+
+                if self.workers == 1:
+                    self._merge_partial(compare_rows(pairs, 0, header, self.limit, self.keep_all))
+                else:
+                    # Los lotes se leen aquí (un campo entre comillas puede
+                    # abarcar varias líneas) y se combinan en orden de envío
+                    with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                        in_flight = deque()
+                        first_row = 0
+                        while True:
+                            batch = list(islice(pairs, _BATCH_ROWS))
+                            if not batch:
+                                break
+                            in_flight.append(executor.submit(
+                                compare_rows, batch, first_row, header, self.limit, self.keep_all))
+                            first_row += len(batch)
+                            if len(in_flight) >= self.workers * _BATCHES_PER_WORKER:
+                                self._merge_partial(in_flight.popleft().result())
+                        while in_flight:
+                            self._merge_partial(in_flight.popleft().result())
+
+                # Filas del original que no tienen par en el limpio
+                self._counts['total_rows'] += sum(1 for _ in r1)
+
+                self._finish_column_stats()
         except Exception as e:
             print(f"❌ Error: {e}")
-            return []
-    
-    def analyze(self) -> None:
-        """Analiza cambios entre archivos"""
-        original_data = self.read_file(self.original)
-        cleaned_data = self.read_file(self.cleaned)
-
-        if not original_data or not cleaned_data:
-            print("❌ Error al leer archivos")
             return
 
-        self.stats['total_rows'] = len(original_data)
-        self.stats['total_cols'] = len(original_data[0]) if original_data else 0
-
-        # Inicializar estadísticas por columna
-        self._init_column_stats(original_data)
-
-        changed_rows = set()
-
-        # Comparar fila por fila
-        for row_idx in range(min(len(original_data), len(cleaned_data))):
-            orig_row = original_data[row_idx]
-            clean_row = cleaned_data[row_idx]
-
-            for col_idx in range(min(len(orig_row), len(clean_row))):
-                orig_val = orig_row[col_idx]
-                clean_val = clean_row[col_idx]
-
-                # Detectar celdas vacías
-                if not orig_val.strip():
-                    self.stats['empty_cells_original'] += 1
-                if not clean_val.strip():
-                    self.stats['empty_cells_cleaned'] += 1
-
-                # Actualizar estadísticas por columna
-                self._update_column_stats(col_idx, orig_val, clean_val)
-
-                if orig_val != clean_val:
-                    changed_rows.add(row_idx)
-                    self.stats['changed_cells'] += 1
-
-                    # Determinar tipo de cambio
-                    change_type = self._classify_change(orig_val, clean_val)
-                    self.stats['changes_by_type'][change_type] += 1
-
-                    # Calcular caracteres
-                    self.stats['char_removed'] += len(orig_val)
-                    self.stats['char_added'] += len(clean_val)
-
-                    self.changes.append({
-                        'row': row_idx + 1,
-                        'col': col_idx + 1,
-                        'col_name': original_data[0][col_idx] if row_idx == 0 else 'N/A',
-                        'original': orig_val,
-                        'cleaned': clean_val,
-                        'type': change_type
-                    })
+        counts = self._counts
+        for key in _COUNTER_KEYS:
+            self.stats[key] = counts[key]
+        self.stats['changes_by_type'] = {
+            change_type: counts[change_type] for change_type in CHANGE_TYPES if counts[change_type]
+        }
 
-        self.stats['changed_rows'] = len(changed_rows)
-    
-    def _init_column_stats(self, data: List[List[str]]) -> None:
+    def _merge_partial(self, partial: Dict[str, Any]) -> None:
+        """Suma el resultado de compare_rows sobre un tramo de filas"""
+        # Los tramos llegan en orden: los cambios previos al tramo fijan
+        # cuántos de los suyos caben aún en el detalle mostrado
+        shown_left = self.limit - self._counts['changed_cells']
+        self._counts.update(partial['counts'])
+
+        col_names = self._header
+        num_names = len(col_names)
+        for idx, (row, col, orig_val, clean_val, change_code) in enumerate(partial['changes']):
+            if idx >= shown_left:
+                self.remaining_by_row[row].append(col)
+                if not self.keep_all:
+                    continue
+            self.changes.append({
+                'row': row,
+                'col': col,
+                'col_name': col_names[col - 1] if col <= num_names else 'N/A',
+                'original': orig_val,
+                'cleaned': clean_val,
+                'type': CHANGE_TYPES[change_code]
+            })
+        for row, col in partial['remaining']:
+            self.remaining_by_row[row].append(col)
+
+        # Estadísticas por columna
+        self._row_widths.update(partial['row_widths'])
+        for col_stats, empty_count, samples in zip(self.column_stats.values(),
+                                                   partial['empty_by_col'], partial['samples']):
+            col_stats['empty_count'] += empty_count
+            missing = 3 - len(col_stats['sample_values'])
+            if missing > 0:
+                col_stats['sample_values'].extend(samples[:missing])
+
+    def _init_column_stats(self, header: List[str]) -> None:
         """Inicializa estadísticas por columna"""
-        num_cols = len(data[0]) if data else 0
-        for col_idx in range(num_cols):
-            col_name = data[0][col_idx] if data else f"Col_{col_idx}"
+        self._header = header
+        for col_idx, col_name in enumerate(header):
             self.column_stats[col_idx] = {
                 'name': col_name,
                 'empty_count': 0,
@@ -116,113 +409,84 @@ class ChangeAnalyzer:
                 'sample_values': []
             }
 
-    def _update_column_stats(self, col_idx: int, orig_val: str, clean_val: str) -> None:
-        """Actualiza estadísticas de columna"""
-        if col_idx not in self.column_stats:
-            return
-
-        stats = self.column_stats[col_idx]
-        stats['total_count'] += 1
+    def _finish_column_stats(self) -> None:
+        """Completa los totales por columna a partir del ancho de las filas"""
+        for col_idx, stats in self.column_stats.items():
+            stats['total_count'] = sum(rows for width, rows in self._row_widths.items()
+                                       if width > col_idx)
+            stats['filled_count'] = stats['total_count'] - stats['empty_count']
 
-        if not clean_val.strip():
-            stats['empty_count'] += 1
-        else:
-            stats['filled_count'] += 1
-            # Guardar ejemplos de valores
-            if len(stats['sample_values']) < 3:
-                stats['sample_values'].append(clean_val[:50])
-
-    def _classify_change(self, original: str, cleaned: str) -> str:
-        """Clasifica el tipo de cambio"""
-        # Detectar si es cambio de vacío a lleno o viceversa
-        orig_empty = not original.strip()
-        clean_empty = not cleaned.strip()
-
-        if orig_empty and not clean_empty:
-            return "Relleno"
-        elif not orig_empty and clean_empty:
-            return "Vaciado"
-        elif len(original) > len(cleaned):
-            return "Reducción"
-        elif len(original) < len(cleaned):
-            return "Expansión"
-        elif original.strip() != cleaned.strip():
-            return "Espacios"
-        else:
-            return "Caracteres"
-    
-    def print_summary(self) -> None:
+    def print_summary(self, out: TextIO = None) -> None:
         """Imprime resumen de cambios"""
-        print("\n" + "╔" + "═" * 78 + "╗")
-        print("║" + "RESUMEN DE CAMBIOS".center(78) + "║")
-        print("╚" + "═" * 78 + "╝\n")
-
-        print(f"📊 ESTADÍSTICAS GENERALES")
-        print(f"  Total de filas: {self.stats['total_rows']}")
-        print(f"  Total de columnas: {self.stats['total_cols']}")
-        print(f"  Filas modificadas: {self.stats['changed_rows']}")
-        print(f"  Celdas modificadas: {self.stats['changed_cells']}")
-        print(f"  Caracteres removidos: {self.stats['char_removed']}")
-        print(f"  Caracteres agregados: {self.stats['char_added']}")
-        print()
+        out = out or sys.stdout
+        print(_SUMMARY_BOX, file=out)
+
+        print(f"📊 ESTADÍSTICAS GENERALES", file=out)
+        print(f"  Total de filas: {self.stats['total_rows']}", file=out)
+        print(f"  Total de columnas: {self.stats['total_cols']}", file=out)
+        print(f"  Filas modificadas: {self.stats['changed_rows']}", file=out)
+        print(f"  Celdas modificadas: {self.stats['changed_cells']}", file=out)
+        print(f"  Caracteres removidos: {self.stats['char_removed']}", file=out)
+        print(f"  Caracteres agregados: {self.stats['char_added']}", file=out)
+        print(file=out)
 
         # Mostrar estadísticas de valores vacíos
-        print(f"🔍 ANÁLISIS DE VALORES VACÍOS")
-        print(f"  Celdas vacías en original: {self.stats['empty_cells_original']}")
-        print(f"  Celdas vacías en limpio: {self.stats['empty_cells_cleaned']}")
-        print()
+        print(f"🔍 ANÁLISIS DE VALORES VACÍOS", file=out)
+        print(f"  Celdas vacías en original: {self.stats['empty_cells_original']}", file=out)
+        print(f"  Celdas vacías en limpio: {self.stats['empty_cells_cleaned']}", file=out)
+        print(file=out)
 
         if self.stats['changes_by_type']:
-            print(f"📈 TIPOS DE CAMBIOS")
+            print(f"📈 TIPOS DE CAMBIOS", file=out)
             for change_type, count in sorted(self.stats['changes_by_type'].items(),
                                             key=lambda x: x[1], reverse=True):
-                print(f"  {change_type}: {count}")
-            print()
+                print(f"  {change_type}: {count}", file=out)
+            print(file=out)
     
-    def print_changes(self, limit: int = 10) -> None:
+    def print_changes(self, out: TextIO = None) -> None:
         """Imprime cambios detectados"""
-        if not self.changes:
-            print("✓ No se encontraron cambios")
+        out = out or sys.stdout
+        limit = self.limit
+        total = self.stats['changed_cells']
+        if not total:
+            print("✓ No se encontraron cambios", file=out)
             return
         
-        print(f"📝 CAMBIOS DETECTADOS (mostrando {min(limit, len(self.changes))} de {len(self.changes)})\n")
+        print(f"📝 CAMBIOS DETECTADOS (mostrando {min(limit, total)} de {total})\n", file=out)
         
         for idx, change in enumerate(self.changes[:limit], 1):
-            print(f"Cambio #{idx}")
-            print(f"  📍 Ubicación: Fila {change['row']}, Columna {change['col']}")
-            print(f"  📋 Campo: {change['col_name']}")
-            print(f"  🔄 Tipo: {change['type']}")
-            print(f"  ❌ Original: {repr(change['original'][:60])}")
-            print(f"  ✅ Limpio:   {repr(change['cleaned'][:60])}")
-            print()
+            print(f"Cambio #{idx}", file=out)
+            print(f"  📍 Ubicación: Fila {change['row']}, Columna {change['col']}", file=out)
+            print(f"  📋 Campo: {change['col_name']}", file=out)
+            print(f"  🔄 Tipo: {change['type']}", file=out)
+            print(f"  ❌ Original: {repr(change['original'][:_SHOWN_CHARS])}", file=out)
+            print(f"  ✅ Limpio:   {repr(change['cleaned'][:_SHOWN_CHARS])}", file=out)
+            print(file=out)
         
-        if len(self.changes) > limit:
-            print(f"⚠️  Hay {len(self.changes) - limit} cambios más no mostrados\n")
-            self._print_remaining_summary(limit)
+        if total > limit:
+            print(f"⚠️  Hay {total - limit} cambios más no mostrados\n", file=out)
+            self._print_remaining_summary(out)
     
-    def _print_remaining_summary(self, limit: int) -> None:
+    def _print_remaining_summary(self, out: TextIO) -> None:
         """Imprime resumen de cambios restantes"""
-        print("📋 RESUMEN DE CAMBIOS RESTANTES\n")
+        print("📋 RESUMEN DE CAMBIOS RESTANTES\n", file=out)
 
-        changes_by_row = defaultdict(list)
-        for change in self.changes[limit:]:
-            changes_by_row[change['row']].append(change['col'])
+        changes_by_row = self.remaining_by_row
 
-        print(f"Total de cambios restantes: {len(self.changes) - limit}\n")
-        print("Ubicaciones (Fila → Columnas):\n")
+        print(f"Total de cambios restantes: {self.stats['changed_cells'] - self.limit}\n", file=out)
+        print("Ubicaciones (Fila → Columnas):\n", file=out)
 
         for row in sorted(changes_by_row.keys())[:20]:  # Mostrar primeras 20 filas
             cols = sorted(changes_by_row[row])
-            print(f"  Fila {row:4d} → Columnas {cols}")
+            print(f"  Fila {row:4d} → Columnas {cols}", file=out)
 
         if len(changes_by_row) > 20:
-            print(f"  ... y {len(changes_by_row) - 20} filas más")
+            print(f"  ... y {len(changes_by_row) - 20} filas más", file=out)
 
-    def print_empty_cells_analysis(self) -> None:
+    def print_empty_cells_analysis(self, out: TextIO = None) -> None:
         """Imprime análisis de valores vacíos por columna"""
-        print("\n" + "╔" + "═" * 78 + "╗")
-        print("║" + "ANÁLISIS DE VALORES VACÍOS POR COLUMNA".center(78) + "║")
-        print("╚" + "═" * 78 + "╝\n")
+        out = out or sys.stdout
+        print(_EMPTY_CELLS_BOX, file=out)
 
         # Filtrar columnas con valores vacíos
         empty_columns = []
@@ -239,67 +503,70 @@ class ChangeAnalyzer:
                 })
 
         if not empty_columns:
-            print("✓ No se encontraron valores vacíos\n")
+            print("✓ No se encontraron valores vacíos\n", file=out)
             return
 
         # Ordenar por porcentaje de vacíos
         empty_columns.sort(key=lambda x: x['percentage'], reverse=True)
 
-        print(f"📊 COLUMNAS CON VALORES VACÍOS ({len(empty_columns)} columnas)\n")
+        print(f"📊 COLUMNAS CON VALORES VACÍOS ({len(empty_columns)} columnas)\n", file=out)
 
         for col in empty_columns:
-            print(f"Columna {col['idx'] + 1}: {col['name']}")
-            print(f"  Vacíos: {col['empty_count']} ({col['percentage']:.1f}%)")
-            print(f"  Llenos: {col['filled_count']}")
+            print(f"Columna {col['idx'] + 1}: {col['name']}", file=out)
+            print(f"  Vacíos: {col['empty_count']} ({col['percentage']:.1f}%)", file=out)
+            print(f"  Llenos: {col['filled_count']}", file=out)
 
             # Sugerir acción
             if col['percentage'] > 80:
-                print(f"  💡 SUGERENCIA: Eliminar columna (>80% vacíos)")
+                print(f"  💡 SUGERENCIA: Eliminar columna (>80% vacíos)", file=out)
             elif col['percentage'] > 50:
-                print(f"  💡 SUGERENCIA: Revisar si debe eliminarse (>50% vacíos)")
+                print(f"  💡 SUGERENCIA: Revisar si debe eliminarse (>50% vacíos)", file=out)
             elif col['percentage'] > 20:
-                print(f"  💡 SUGERENCIA: Considerar rellenar con valor por defecto")
+                print(f"  💡 SUGERENCIA: Considerar rellenar con valor por defecto", file=out)
             else:
-                print(f"  💡 SUGERENCIA: Rellenar manualmente o con interpolación")
+                print(f"  💡 SUGERENCIA: Rellenar manualmente o con interpolación", file=out)
 
             # Mostrar ejemplos de valores
             if col['samples']:
-                print(f"  Ejemplos: {', '.join(col['samples'][:2])}")
-            print()
+                print(f"  Ejemplos: {', '.join(col['samples'][:2])}", file=out)
+            print(file=out)
     
     def export_report(self, output_file: str) -> None:
         """Exporta reporte a archivo"""
+        buf = io.StringIO()
+        buf.write("REPORTE DE CAMBIOS - VISUALIZADOR\n")
+        buf.write("=" * 80 + "\n\n")
+        
+        # Resumen
+        buf.write("ESTADÍSTICAS GENERALES\n")
+        buf.write("-" * 80 + "\n")
+        buf.write(f"Total de filas: {self.stats['total_rows']}\n")
+        buf.write(f"Total de columnas: {self.stats['total_cols']}\n")
+        buf.write(f"Filas modificadas: {self.stats['changed_rows']}\n")
+        buf.write(f"Celdas modificadas: {self.stats['changed_cells']}\n")
+        buf.write(f"Caracteres removidos: {self.stats['char_removed']}\n")
+        buf.write(f"Caracteres agregados: {self.stats['char_added']}\n\n")
+        
+        # Tipos de cambios
+        buf.write("TIPOS DE CAMBIOS\n")
+        buf.write("-" * 80 + "\n")
+        for change_type, count in sorted(self.stats['changes_by_type'].items()):
+            buf.write(f"{change_type}: {count}\n")
+        buf.write("\n")
+        
+        # Cambios (un solo write por cambio)
+        buf.write("CAMBIOS DETECTADOS\n")
+        buf.write("-" * 80 + "\n")
+        for idx, change in enumerate(self.changes, 1):
+            buf.write(f"\nCambio #{idx}\n"
+                      f"  Ubicación: Fila {change['row']}, Columna {change['col']}\n"
+                      f"  Campo: {change['col_name']}\n"
+                      f"  Tipo: {change['type']}\n"
+                      f"  Original: {repr(change['original'])}\n"
+                      f"  Limpio: {repr(change['cleaned'])}\n")
+        
         with open(output_file, 'w', encoding='utf-8') as f:
-            f.write("REPORTE DE CAMBIOS - VISUALIZADOR\n")
-            f.write("=" * 80 + "\n\n")
-            
-            # Resumen
-            f.write("ESTADÍSTICAS GENERALES\n")
-            f.write("-" * 80 + "\n")
-            f.write(f"Total de filas: {self.stats['total_rows']}\n")
-            f.write(f"Total de columnas: {self.stats['total_cols']}\n")
-            f.write(f"Filas modificadas: {self.stats['changed_rows']}\n")
-            f.write(f"Celdas modificadas: {self.stats['changed_cells']}\n")
-            f.write(f"Caracteres removidos: {self.stats['char_removed']}\n")
-            f.write(f"Caracteres agregados: {self.stats['char_added']}\n\n")
-            
-            # Tipos de cambios
-            f.write("TIPOS DE CAMBIOS\n")
-            f.write("-" * 80 + "\n")
-            for change_type, count in sorted(self.stats['changes_by_type'].items()):
-                f.write(f"{change_type}: {count}\n")
-            f.write("\n")
-            
-            # Cambios
-            f.write("CAMBIOS DETECTADOS\n")
-            f.write("-" * 80 + "\n")
-            for idx, change in enumerate(self.changes, 1):
-                f.write(f"\nCambio #{idx}\n")
-                f.write(f"  Ubicación: Fila {change['row']}, Columna {change['col']}\n")
-                f.write(f"  Campo: {change['col_name']}\n")
-                f.write(f"  Tipo: {change['type']}\n")
-                f.write(f"  Original: {repr(change['original'])}\n")
-                f.write(f"  Limpio: {repr(change['cleaned'])}\n")
+            f.write(buf.getvalue())
         
         print(f"✓ Reporte exportado a: {output_file}")
 
@@ -315,6 +582,15 @@ def main():
                        help='Número de cambios a mostrar (default: 10)')
     parser.add_argument('--empty', action='store_true',
                        help='Mostrar análisis de valores vacíos')
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                       help='Procesos para comparar lotes de filas (default: 1)')
+    readers = parser.add_mutually_exclusive_group()
+    readers.add_argument('--fast', action='store_true',
+                         help='Separar por el delimitador sin interpretar comillas '
+                              '(solo para archivos sin campos entre comillas)')
+    readers.add_argument('--arrow', action='store_true',
+                         help='Leer con pyarrow (requiere pyarrow y filas con el '
+                              'mismo número de columnas que el encabezado)')
 
     args = parser.parse_args()
 
@@ -327,18 +603,26 @@ def main():
         print(f"❌ Error: {args.cleaned} no existe")
         sys.exit(1)
 
+    if args.arrow and pacsv is None:
+        print("⚠️  pyarrow no está instalado; se usa el lector csv")
+
     # Analizar
     print("🔍 Analizando cambios...")
-    analyzer = ChangeAnalyzer(args.original, args.cleaned)
+    analyzer = ChangeAnalyzer(args.original, args.cleaned, limit=args.limit,
+                              keep_all=bool(args.output), workers=args.workers,
+                              fast=args.fast, arrow=args.arrow)
     analyzer.analyze()
 
-    # Mostrar resultados
-    analyzer.print_summary()
-    analyzer.print_changes(args.limit)
+    # Mostrar resultados (armados en memoria y escritos de una vez)
+    buf = io.StringIO()
+    analyzer.print_summary(buf)
+    analyzer.print_changes(buf)
 
     # Mostrar análisis de valores vacíos si se solicita
     if args.empty:
-        analyzer.print_empty_cells_analysis()
+        analyzer.print_empty_cells_analysis(buf)
+
+    sys.stdout.write(buf.getvalue())
 
     # Exportar si se especifica
     if args.output: